@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+异步并发爬虫
+基于asyncio同时抓取多个页面，并发数由CRAWLER_SETTINGS['concurrent_requests']控制
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from crawler import WebCrawler
+from utils.logger import crawler_logger, url_logger
+from config import CRAWLER_SETTINGS
+
+
+class AsyncWebCrawler(WebCrawler):
+    """异步网页爬虫类，最多同时发出concurrent_requests个请求"""
+
+    def __init__(self, concurrent_requests=None):
+        super().__init__()
+        if concurrent_requests is None:
+            concurrent_requests = CRAWLER_SETTINGS['concurrent_requests']
+        self.concurrent_requests = max(1, int(concurrent_requests))
+
+        # requests是阻塞库，放到线程池中执行，由事件循环负责并发调度
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrent_requests)
+
+        # 连接池大小与并发数一致，避免并发请求时连接被丢弃
+        self.connections = self._create_connection_manager(self.concurrent_requests)
+
+        crawler_logger.info(f"异步爬虫初始化完成，并发数: {self.concurrent_requests}")
+
+    async def crawl_single_page_async(self, url, selectors, use_selenium=False):
+        """异步爬取单个页面，返回值与crawl_single_page相同"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.crawl_single_page, url, selectors, use_selenium
+        )
+
+    async def crawl_multiple_pages_async(self, urls, selectors, use_selenium=False, checkpoint=None):
+        """异步并发爬取多个页面，结果按urls的顺序返回
+
+        指定checkpoint时按批次爬取，每批完成后保存一次进度，参数含义与WebCrawler.crawl_multiple_pages相同
+        """
+        checkpoint, state, resumed = self._open_checkpoint(
+            checkpoint, 'crawl_multiple_pages',
+            {'urls': urls, 'selectors': selectors, 'use_selenium': use_selenium},
+            visited=lambda state: urls[:state['position']]
+        )
+        results = list(resumed)
+        start = state['position'] if state else 0
+        semaphore = asyncio.Semaphore(self.concurrent_requests)
+        total = len(urls)
+
+        async def crawl_one(i, url):
+            async with semaphore:
+                url_logger.info(f"正在爬取 ({i+1}/{total}): {url}")
+                data = await self.crawl_single_page_async(url, selectors, use_selenium)
+            if data:
+                data['source_url'] = url
+            return data
+
+        # 启用断点时分批爬取，保证保存的进度之前的页面都已完成
+        if checkpoint:
+            batch_size = max(CRAWLER_SETTINGS['checkpoint_interval'], self.concurrent_requests)
+        else:
+            batch_size = max(1, total - start)
+
+        # 重复的URL只抓取一次，与顺序爬取时visited_urls的效果一致
+        scheduled = set()
+        for batch_start in range(start, total, batch_size):
+            batch_end = min(batch_start + batch_size, total)
+            tasks = []
+            for i in range(batch_start, batch_end):
+                url = urls[i]
+                if url in scheduled:
+                    crawler_logger.warning(f"URL已访问过: {url}")
+                    continue
+                scheduled.add(url)
+                tasks.append(crawl_one(i, url))
+
+            for data in await asyncio.gather(*tasks):
+                if data:
+                    results.append(data)
+                    if checkpoint:
+                        checkpoint.append_result(data)
+
+            if checkpoint:
+                self._save_checkpoint(checkpoint, batch_end, finished=batch_end == total)
+
+        return results
+
+    def crawl_multiple_pages(self, urls, selectors, use_selenium=False, checkpoint=None):
+        """并发爬取多个页面（同步入口，已在事件循环中时请使用crawl_multiple_pages_async）"""
+        return asyncio.run(self.crawl_multiple_pages_async(urls, selectors, use_selenium, checkpoint))
+
+    def close(self):
+        """关闭线程池，并释放浏览器池和会话连接"""
+        self.executor.shutdown(wait=True)
+        super().close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬取流程基准测试
+启动本地合成网站（benchmarks/synthetic_server.py），用WebCrawler和SimpleImageCrawler爬取，
+统计 页面/秒、MB/秒、每页解析耗时和峰值内存，不访问真实网站
+
+每个场景在独立的子进程中运行，峰值内存互不影响
+
+用法: python benchmarks/bench_crawl.py [--pages 50] [--page-kb 50] [--latency-ms 20] [--error-rate 0] [--prefetch 1]
+                                      [--scenarios multiple pagination images simple_images]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_DIR)
+
+from synthetic_server import SyntheticSite, start_server
+
+try:
+    import resource
+except ImportError:
+    # Windows上没有resource模块，不统计峰值内存
+    resource = None
+
+SCENARIOS = ('multiple', 'pagination', 'images', 'simple_images')
+
+SELECTORS = {
+    'title': 'title',
+    'headings': 'h1, h2',
+    'paragraphs': 'p',
+    'links': 'a[href]',
+}
+
+
+def peak_rss_mb():
+    """当前进程的峰值内存（MB）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux上单位为KB，macOS上为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def configure_crawler():
+    """关闭请求间隔、robots.txt、HTTP缓存、图片仓库和图片过滤，让测试只反映爬取本身的开销"""
+    from config import (CRAWLER_SETTINGS, HTTP_CACHE_CONFIG, IMAGE_STORE_CONFIG, IMAGE_FILTER_CONFIG, METRICS_CONFIG,
+                        LOGGING_CONFIG)
+
+    CRAWLER_SETTINGS['download_delay'] = 0
+    CRAWLER_SETTINGS['image_download_delay'] = 0
+    CRAWLER_SETTINGS['respect_robots_txt'] = False
+    HTTP_CACHE_CONFIG['enabled'] = False
+    IMAGE_STORE_CONFIG['enabled'] = False
+    IMAGE_FILTER_CONFIG['enabled'] = False
+    METRICS_CONFIG['export_file'] = None
+    LOGGING_CONFIG['log_level'] = 'WARNING'
+
+
+def directory_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def run_scenario(scenario, base_url, args):
+    """在子进程中运行一个场景，返回统计结果"""
+    # 日志、数据和图片写入临时目录，结束后删除
+    work_dir = tempfile.mkdtemp(prefix='bench_crawl_')
+    os.chdir(work_dir)
+    sys.path.insert(0, PROJECT_DIR)
+    configure_crawler()
+    try:
+        return _run_scenario(scenario, base_url, args)
+    finally:
+        os.chdir(PROJECT_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _run_scenario(scenario, base_url, args):
+
+    result = {'scenario': scenario}
+    if scenario == 'simple_images':
+        from simple_image_crawler import SimpleImageCrawler
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            crawler = SimpleImageCrawler()
+            crawler.scheduler.delay = 0
+            crawler.scheduler.image_delay = 0
+            start = time.perf_counter()
+            files = crawler.download_images_from_page(f"{base_url}/gallery", save_dir='images')
+        elapsed = time.perf_counter() - start
+        result.update(items=len(files), bytes=directory_bytes('images'), parse_ms=None)
+    else:
+        from crawler import WebCrawler
+
+        crawler = WebCrawler()
+        start = time.perf_counter()
+        if scenario == 'multiple':
+            urls = [f"{base_url}/page/{i}" for i in range(args.pages)]
+            items = len(crawler.crawl_multiple_pages(urls, SELECTORS))
+        elif scenario == 'pagination':
+            items = len(crawler.crawl_with_pagination(f"{base_url}/list", SELECTORS, max_pages=args.pages + 1,
+                                                      prefetch=args.prefetch))
+        else:
+            items = len(crawler.download_images_from_page(f"{base_url}/gallery", save_dir='images'))
+        elapsed = time.perf_counter() - start
+
+        summary = crawler.metrics.stage_summary()
+        parse_total = sum(summary.get(stage, {}).get('total', 0.0) for stage in ('parse', 'extract'))
+        parsed = summary.get('extract', {}).get('count', 0)
+        result.update(
+            items=items,
+            bytes=crawler.metrics.counter_value('crawler_bytes_total'),
+            parse_ms=parse_total / parsed * 1000 if parsed else None
+        )
+        crawler.close()
+
+    result.update(
+        elapsed=elapsed,
+        items_per_sec=result['items'] / elapsed if elapsed else 0.0,
+        mb_per_sec=result['bytes'] / (1024 * 1024) / elapsed if elapsed else 0.0,
+        peak_rss_mb=peak_rss_mb()
+    )
+    return result
+
+
+def format_row(result):
+    parse_ms = f"{result['parse_ms']:8.2f}" if result['parse_ms'] is not None else f"{'-':>8}"
+    peak = f"{result['peak_rss_mb']:8.1f}" if result['peak_rss_mb'] is not None else f"{'-':>8}"
+    return (f"{result['scenario']:<14} {result['items']:>6} {result['elapsed']:8.2f} "
+            f"{result['items_per_sec']:9.1f} {result['mb_per_sec']:8.2f} {parse_ms} {peak}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬取流程基准测试')
+    parser.add_argument('--pages', type=int, default=50, help='multiple和pagination场景爬取的页面数')
+    parser.add_argument('--page-kb', type=int, default=50, help='页面大小（KB）')
+    parser.add_argument('--prefetch', type=int, default=1, help='pagination场景同时抓取的页数')
+    parser.add_argument('--links', type=int, default=20, help='每个页面的链接数')
+    parser.add_argument('--images', type=int, default=10, help='每个页面的图片数')
+    parser.add_argument('--gallery-images', type=int, default=50, help='图片场景下载的图片数')
+    parser.add_argument('--image-kb', type=int, default=20, help='图片大小（KB）')
+    parser.add_argument('--latency-ms', type=int, default=20, help='服务器对每个请求注入的延迟（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='服务器返回503的比例')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--json', help='将结果另存为JSON文件')
+    args = parser.parse_args()
+
+    site = SyntheticSite(page_kb=args.page_kb, links=args.links, images=args.images, image_kb=args.image_kb,
+                         list_pages=args.pages, gallery_images=args.gallery_images,
+                         latency_ms=args.latency_ms, error_rate=args.error_rate)
+    server, base_url = start_server(site)
+    print(f"合成网站: {base_url}, 页面 {args.page_kb} KB, 链接 {args.links}, 图片 {args.images}, "
+          f"延迟 {args.latency_ms} ms, 错误率 {args.error_rate}")
+    print(f"{'场景':<12} {'条数':>5} {'耗时(s)':>8} {'条/秒':>7} {'MB/秒':>7} {'解析ms/页':>7} {'峰值MB':>6}")
+
+    # spawn启动的子进程不继承父进程的内存，峰值内存只反映该场景
+    context = multiprocessing.get_context('spawn')
+    results = []
+    try:
+        for scenario in args.scenarios:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_scenario, (scenario, base_url, args))
+            results.append(result)
+            print(format_row(result))
+    finally:
+        server.shutdown()
+
+    print(f"服务器共处理 {site.requests} 个请求，注入错误 {site.errors} 个")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+字段提取基准测试
+对比逐个字段调用soup.select（旧方式）与编译后的ExtractionPlan一次遍历的耗时
+
+用法: python benchmarks/bench_extraction.py [--pages 10] [--paragraphs 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from utils.extraction import ExtractionPlan
+
+# 文章页常见的选择器组合
+SELECTORS = {
+    'title': 'title',
+    'headings': 'h1, h2, h3',
+    'paragraphs': 'p',
+    'links': 'a[href]',
+    'images': 'img',
+    'image_attrs': 'img',
+    'summary': 'div.summary',
+    'tags': 'span.tag',
+    'author': 'div.meta > span.author',
+    'time': 'time',
+    'article_html': 'div.content',
+}
+
+
+def build_html(paragraphs):
+    """生成一个大型文章页面"""
+    parts = ['<html><head><title>bench</title></head><body>',
+             '<div class="meta"><span class="author">作者</span><time>2026-01-01</time></div>',
+             '<div class="summary">摘要</div><div class="content">']
+    for i in range(paragraphs):
+        parts.append(
+            f'<h2>小节 {i}</h2><p>段落 {i} ' + '文字 ' * 20 + f'<a href="/link/{i}">链接</a></p>'
+            f'<span class="tag">标签{i % 10}</span><img src="/img/{i}.png" alt="图片 {i}">'
+        )
+    parts.append('</div></body></html>')
+    return ''.join(parts)
+
+
+def select_per_field(soup, selectors):
+    """旧方式：每个字段单独遍历一次文档树，_html字段使用prettify"""
+    data = {}
+    for field_name, selector in selectors.items():
+        elements = soup.select(selector)
+        if not elements:
+            data[field_name] = None
+            continue
+        if field_name.endswith('_html'):
+            values = [elem.prettify() for elem in elements]
+        elif field_name.endswith('_attrs'):
+            values = [elem.attrs for elem in elements]
+        else:
+            values = [elem.get_text(strip=True) for elem in elements]
+        data[field_name] = values[0] if len(values) == 1 else values
+    return data
+
+
+def timed(func, soup, pages):
+    """多次执行func，返回平均每页耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(pages):
+        func(soup)
+    return (time.perf_counter() - start) / pages * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='字段提取基准测试')
+    parser.add_argument('--pages', type=int, default=10, help='每种方式重复提取的次数')
+    parser.add_argument('--paragraphs', type=int, default=2000, help='每个页面的段落数')
+    args = parser.parse_args()
+
+    html = build_html(args.paragraphs)
+    soup = BeautifulSoup(html, 'lxml')
+    print(f"页面大小: {len(html.encode('utf-8')) / 1024:.1f} KB, 字段数: {len(SELECTORS)}")
+
+    prettify_plan = ExtractionPlan(SELECTORS, html_mode='prettify')
+    raw_plan = ExtractionPlan(SELECTORS, html_mode='raw')
+    assert prettify_plan.extract(soup) == select_per_field(soup, SELECTORS)
+
+    baseline = timed(lambda s: select_per_field(s, SELECTORS), soup, args.pages)
+    print(f"{'逐字段select + prettify':<26} {baseline:8.1f} ms/页  1.00x")
+    for name, plan in (('ExtractionPlan + prettify', prettify_plan), ('ExtractionPlan + raw', raw_plan)):
+        elapsed = timed(plan.extract, soup, args.pages)
+        print(f"{name:<26} {elapsed:8.1f} ms/页  {baseline / elapsed:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
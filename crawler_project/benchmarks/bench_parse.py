@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+HTML解析基准测试
+对比每个提取方法各自解析一次（旧方式）与共用一次解析（get_soup缓存）的耗时
+
+用法: python benchmarks/bench_parse.py [--pages 20] [--paragraphs 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from utils.html_parser import get_soup, resolve_parser
+
+
+class FakeResponse:
+    """模拟requests的响应对象"""
+
+    def __init__(self, html, url='http://bench.local/page'):
+        self.text = html
+        self.url = url
+        self.status_code = 200
+
+
+def build_html(paragraphs):
+    """生成包含段落、链接和图片的测试页面"""
+    parts = ['<html><head><title>bench</title></head><body>']
+    for i in range(paragraphs):
+        parts.append(
+            f'<div class="item"><h2>标题 {i}</h2><p>段落内容 {i} ' + '文字 ' * 20 + '</p>'
+            f'<a href="/link/{i}">链接 {i}</a><img src="/img/{i}.png" alt="图片 {i}"></div>'
+        )
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def extract_all(soup):
+    """模拟parse_page、extract_links、extract_images的选择器查询"""
+    soup.select('title')
+    soup.select('h2')
+    soup.select('p')
+    soup.select('a[href]')
+    soup.select('img')
+
+
+def bench_separate(html, pages, parser):
+    """旧方式：三个提取方法各自解析一次"""
+    start = time.perf_counter()
+    for _ in range(pages):
+        for _ in range(3):
+            extract_all(BeautifulSoup(html, parser))
+    return time.perf_counter() - start
+
+
+def bench_shared(html, pages, parser):
+    """新方式：同一响应只解析一次"""
+    start = time.perf_counter()
+    for _ in range(pages):
+        response = FakeResponse(html)
+        for _ in range(3):
+            extract_all(get_soup(response, parser))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML解析基准测试')
+    parser.add_argument('--pages', type=int, default=20, help='每种方式解析的页面数')
+    parser.add_argument('--paragraphs', type=int, default=2000, help='每个页面的段落数')
+    args = parser.parse_args()
+
+    html = build_html(args.paragraphs)
+    print(f"页面大小: {len(html.encode('utf-8')) / 1024:.1f} KB, 页面数: {args.pages}")
+
+    baseline = bench_separate(html, args.pages, 'html.parser')
+    print(f"{'各自解析 (html.parser)':<28} {baseline / args.pages * 1000:8.1f} ms/页  1.00x")
+
+    for name in ('html.parser', 'lxml'):
+        if resolve_parser(name) != name:
+            print(f"{name} 未安装，跳过")
+            continue
+        elapsed = bench_shared(html, args.pages, name)
+        print(f"{'共用解析 (' + name + ')':<28} {elapsed / args.pages * 1000:8.1f} ms/页  {baseline / elapsed:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+提取结果内存基准测试
+对比普通字典与紧凑的PageRecord保存大量页面的提取结果时占用的内存、提取耗时和写入JSON Lines的耗时
+
+用法: python benchmarks/bench_records.py [--pages 1000] [--paragraphs 20] [--html-mode prettify]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from utils.extraction import ExtractionPlan
+from utils.records import to_json_line
+
+# 列表页常见的选择器组合，包含一个_html字段
+SELECTORS = {
+    'title': 'title',
+    'headings': 'h1, h2',
+    'paragraphs': 'p',
+    'links': 'a[href]',
+    'image_attrs': 'img',
+    'tags': 'span.tag',
+    'author': 'div.meta > span.author',
+    'content_html': 'div.content',
+}
+
+
+def build_html(n, paragraphs):
+    """生成第n个页面，每个页面的内容都不相同"""
+    parts = [f'<html><head><title>页面 {n}</title></head><body>',
+             f'<div class="meta"><span class="author">作者{n % 50}</span></div><div class="content">']
+    for i in range(paragraphs):
+        parts.append(
+            f'<h2>小节 {n}-{i}</h2><p>段落 {n}-{i} ' + '文字 ' * 30 + f'<a href="/item/{n}/{i}">链接</a></p>'
+            f'<span class="tag">标签{i % 10}</span><img src="/img/{n}/{i}.png" alt="图片 {i}">'
+        )
+    parts.append('</div></body></html>')
+    return ''.join(parts)
+
+
+def deep_size(root):
+    """root及其引用的所有对象占用的字节数，共用的对象（如驻留的字符串、共用的字段名）只计算一次"""
+    seen = set()
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def measure(plan, args):
+    """提取所有页面并保留结果，返回(结果列表, 结果占用的字节数, 平均提取耗时ms)"""
+    results = []
+    extract_time = 0.0
+    for n in range(args.pages):
+        soup = BeautifulSoup(build_html(n, args.paragraphs), 'lxml')
+        start = time.perf_counter()
+        results.append(plan.extract(soup))
+        extract_time += time.perf_counter() - start
+    return results, deep_size(results), extract_time / args.pages * 1000
+
+
+def serialize_ms(results):
+    """将所有结果序列化为JSON Lines的耗时（毫秒）"""
+    start = time.perf_counter()
+    for record in results:
+        to_json_line(record)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='提取结果内存基准测试')
+    parser.add_argument('--pages', type=int, default=1000, help='页面数')
+    parser.add_argument('--paragraphs', type=int, default=20, help='每个页面的段落数')
+    parser.add_argument('--html-mode', choices=('prettify', 'raw'), default='prettify', help='_html字段的输出方式')
+    args = parser.parse_args()
+
+    page_kb = len(build_html(0, args.paragraphs).encode('utf-8')) / 1024
+    print(f"页面数: {args.pages}, 页面大小: {page_kb:.1f} KB, 字段数: {len(SELECTORS)}, _html: {args.html_mode}")
+    print(f"{'结果类型':<12} {'内存':>10} {'每页':>10} {'10万页估算':>12} {'提取ms/页':>10} {'JSONL ms':>10}")
+
+    baseline = None
+    for name, compact in (('dict', False), ('PageRecord', True)):
+        plan = ExtractionPlan(SELECTORS, args.html_mode, compact)
+        results, used, extract_ms = measure(plan, args)
+        if baseline is None:
+            baseline = results
+        else:
+            # 两种结果的内容必须一致
+            assert all(dict(record) == expected for record, expected in zip(results, baseline))
+        per_page = used / args.pages
+        print(f"{name:<12} {used / 1024 / 1024:8.1f} MB {per_page / 1024:7.1f} KB "
+              f"{per_page * 100000 / 1024 ** 3:9.2f} GB {extract_ms:10.2f} {serialize_ms(results):10.1f}")
+        del results
+
+
+if __name__ == '__main__':
+    main()
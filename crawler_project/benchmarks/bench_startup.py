@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试
+在全新的子进程中分别测量导入模块和创建爬虫实例的耗时，并列出被导入的重量级依赖
+
+用法: python benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+# 只在特定功能中使用、不应在启动时导入的依赖
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'selenium', 'webdriver_manager', 'fake_useragent')
+
+CASES = (
+    ('import crawler', 'import crawler', 'crawler.WebCrawler().close()'),
+    ('import async_crawler', 'import async_crawler', 'async_crawler.AsyncWebCrawler().close()'),
+    ('import simple_image_crawler', 'import simple_image_crawler', 'simple_image_crawler.SimpleImageCrawler()'),
+)
+
+CHILD_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+{import_code}
+imported = time.perf_counter()
+{init_code}
+finished = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'init_ms': (finished - imported) * 1000,
+    'heavy': [name for name in {heavy!r} if name in sys.modules],
+}}))
+'''
+
+
+def run_case(import_code, init_code, work_dir):
+    """在新进程中运行一次，返回(进程总耗时ms, 子进程内的统计)"""
+    script = CHILD_SCRIPT.format(import_code=import_code, init_code=init_code, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', script], cwd=work_dir, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    wall_ms = (time.perf_counter() - start) * 1000
+    return wall_ms, json.loads(output.strip().splitlines()[-1])
+
+
+def bench_user_agents(count=1000):
+    """对比fake_useragent（已安装时）和本地User-Agent池每次取值的耗时"""
+    from utils.user_agents import UserAgentPool
+
+    pool = UserAgentPool()
+    start = time.perf_counter()
+    for _ in range(count):
+        pool.random
+    print(f"{'UserAgentPool().random':<28} {(time.perf_counter() - start) / count * 1e6:10.2f} us/次")
+
+    try:
+        from fake_useragent import UserAgent
+    except ImportError:
+        print("fake_useragent 未安装，跳过对比")
+        return
+    start = time.perf_counter()
+    ua = UserAgent()
+    print(f"{'fake_useragent.UserAgent()':<28} {(time.perf_counter() - start) * 1000:10.2f} ms")
+    count = max(1, count // 10)
+    start = time.perf_counter()
+    for _ in range(count):
+        ua.random
+    print(f"{'fake_useragent ua.random':<28} {(time.perf_counter() - start) / count * 1e6:10.2f} us/次")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    parser.add_argument('--repeat', type=int, default=5, help='每种情况运行的次数（取中位数）')
+    args = parser.parse_args()
+
+    print(f"{'情况':<26} {'进程总耗时':>10} {'导入':>8} {'初始化':>8}  重量级依赖")
+    # 爬虫初始化会创建数据、缓存和日志目录，在临时目录中运行
+    with tempfile.TemporaryDirectory(prefix='bench_startup_') as work_dir:
+        for name, import_code, init_code in CASES:
+            runs = [run_case(import_code, init_code, work_dir) for _ in range(args.repeat)]
+            wall = statistics.median(wall_ms for wall_ms, _ in runs)
+            import_ms = statistics.median(stats['import_ms'] for _, stats in runs)
+            init_ms = statistics.median(stats['init_ms'] for _, stats in runs)
+            heavy = ', '.join(runs[-1][1]['heavy']) or '-'
+            print(f"{name:<28} {wall:8.1f} ms {import_ms:6.1f} ms {init_ms:6.1f} ms  {heavy}")
+
+    print()
+    bench_user_agents()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基准测试用的本地HTTP服务器
+提供大小、链接数、图片数可配置的合成页面和分页接口，可以注入延迟和错误，测试时不访问真实网站
+
+路径:
+    /page/<n>           合成页面
+    /list?page=<n>      分页接口，超过最后一页返回404
+    /gallery            包含gallery_images张图片的页面
+    /img/<n>.png        合成PNG图片
+    /robots.txt         允许抓取全部页面
+
+单独运行: python benchmarks/synthetic_server.py [--port 8000] [--latency-ms 20]
+"""
+
+import argparse
+import random
+import struct
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class SyntheticSite:
+    """合成网站的参数"""
+
+    def __init__(self, page_kb=50, links=20, images=10, image_kb=20, list_pages=50, gallery_images=50,
+                 latency_ms=0, error_rate=0.0, seed=0):
+        self.page_kb = page_kb
+        self.links = links
+        self.images = images
+        self.image_kb = image_kb
+        self.list_pages = list_pages
+        self.gallery_images = gallery_images
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def should_fail(self):
+        """按error_rate随机决定是否返回503"""
+        with self._random_lock:
+            self.requests += 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return True
+            return False
+
+    @lru_cache(maxsize=1024)
+    def page(self, n, title='page'):
+        """生成第n个合成页面：指定数量的链接和图片，用段落填充到page_kb大小"""
+        parts = [f'<html><head><title>{title} {n}</title></head><body><h1>标题 {n}</h1>']
+        for i in range(self.links):
+            parts.append(f'<a href="/page/{(n * 31 + i * 7) % 100000}">链接 {i}</a>')
+        for i in range(self.images):
+            parts.append(f'<img src="/img/{n * 1000 + i}.png" alt="图片 {i}">')
+
+        paragraph = '<div class="item"><h2>小标题</h2><p>' + '段落内容 ' * 40 + '</p></div>'
+        size = sum(len(part.encode('utf-8')) for part in parts)
+        target = self.page_kb * 1024
+        while size < target:
+            parts.append(paragraph)
+            size += len(paragraph.encode('utf-8'))
+        parts.append('</body></html>')
+        return ''.join(parts).encode('utf-8')
+
+    @lru_cache(maxsize=1)
+    def gallery(self):
+        parts = ['<html><head><title>gallery</title></head><body>']
+        for i in range(self.gallery_images):
+            parts.append(f'<img src="/img/{i}.png" alt="图片 {i}">')
+        parts.append('</body></html>')
+        return ''.join(parts).encode('utf-8')
+
+    @lru_cache(maxsize=4096)
+    def image(self, n):
+        """生成合成PNG：合法的文件头加上填充到image_kb大小的数据块"""
+
+        def chunk(kind, data):
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+        header = b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', 64, 64, 8, 2, 0, 0, 0))
+        padding = max(0, self.image_kb * 1024 - len(header) - 24)
+        # 每张图片内容不同，避免被内容去重
+        filler = (str(n).encode() * (padding // max(1, len(str(n))) + 1))[:padding]
+        return header + chunk(b'tEXt', filler) + chunk(b'IEND', b'')
+
+
+class SyntheticHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    site = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b'', content_type='text/html; charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        site = self.site
+        if site.latency_ms:
+            time.sleep(site.latency_ms / 1000)
+
+        parsed = urlparse(self.path)
+        path = parsed.path
+        if path == '/robots.txt':
+            self._send(200, b'User-agent: *\nAllow: /\n', 'text/plain')
+            return
+        if site.should_fail():
+            self._send(503)
+            return
+
+        if path.startswith('/page/'):
+            self._send(200, site.page(int(path.split('/')[2] or 0)))
+        elif path == '/list':
+            page = int(parse_qs(parsed.query).get('page', ['1'])[0])
+            if 1 <= page <= site.list_pages:
+                self._send(200, site.page(page, 'list'))
+            else:
+                self._send(404)
+        elif path == '/gallery':
+            self._send(200, site.gallery())
+        elif path.startswith('/img/') and path.endswith('.png'):
+            self._send(200, site.image(int(path[5:-4])), 'image/png')
+        else:
+            self._send(404)
+
+
+def start_server(site, host='127.0.0.1', port=0):
+    """在后台线程中启动服务器，返回(server, base_url)"""
+    handler = type('Handler', (SyntheticHandler,), {'site': site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='基准测试用的本地HTTP服务器')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--page-kb', type=int, default=50, help='页面大小（KB）')
+    parser.add_argument('--links', type=int, default=20, help='每个页面的链接数')
+    parser.add_argument('--images', type=int, default=10, help='每个页面的图片数')
+    parser.add_argument('--image-kb', type=int, default=20, help='图片大小（KB）')
+    parser.add_argument('--latency-ms', type=int, default=0, help='每个请求的延迟（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回503的比例')
+    args = parser.parse_args()
+
+    site = SyntheticSite(page_kb=args.page_kb, links=args.links, images=args.images, image_kb=args.image_kb,
+                         latency_ms=args.latency_ms, error_rate=args.error_rate)
+    server, base_url = start_server(site, port=args.port)
+    print(f"服务器已启动: {base_url}，按Ctrl+C停止")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,25 +11,93 @@ BASE_CONFIG = {
         'Upgrade-Insecure-Requests': '1',
     },
     'timeout': 10,  # 请求超时时间（秒）
-    'delay_range': (1, 3),  # 请求间隔时间范围（秒）
-    'max_retries': 3,  # 最大重试次数
+    'max_retries': 3,  # 最大重试次数（连接失败、超时、429和5xx）
+    'retry_backoff_base': 0.5,  # 重试退避基数（秒），第n次重试最多等待 base * 2^n 秒
+    'retry_backoff_max': 30,  # 单次重试最长等待时间（秒），也是Retry-After的上限
     'encoding': 'utf-8',  # 默认编码
 }
 
 # 爬虫设置
 CRAWLER_SETTINGS = {
     'max_pages': 10,  # 最大爬取页数
-    'concurrent_requests': 1,  # 并发请求数
+    'concurrent_requests': 8,  # 并发请求数（AsyncWebCrawler同时发出的最大请求数）
     'respect_robots_txt': True,  # 是否遵守robots.txt
-    'download_delay': 1,  # 下载延迟（秒）
+    'robots_user_agent': '*',  # 匹配robots.txt规则时使用的User-agent名称
+    'robots_cache_ttl': 3600,  # robots.txt缓存时间（秒）
+    'download_delay': 1,  # 同一主机两次请求之间的延迟（秒），不同主机互不影响；robots.txt指定了Crawl-delay时以其为准
+    'randomize_download_delay': True,  # 是否将实际延迟随机化为0.5~1.5倍download_delay
+    'image_download_delay': 0,  # 同一主机两次图片请求之间的延迟（秒），与页面请求分开计算，0表示不等待；None表示与页面共用download_delay
     'random_user_agent': True,  # 是否使用随机User-Agent
+    'user_agents_file': None,  # User-Agent列表文件（每行一个），None表示使用内置的User-Agent池
+    'html_parser': 'html.parser',  # BeautifulSoup解析器: html.parser（内置）或 lxml（更快，但不规范的HTML解析结果可能不同）
+    'html_output': 'prettify',  # _html字段的输出方式: prettify（格式化）或 raw（原始HTML，更快）
+    'compact_records': False,  # True时提取结果使用紧凑的PageRecord（用法与字典相同，长文本压缩保存，内存更少但不是dict），False时为普通字典
+    'url_filter_capacity': None,  # 已访问URL去重容量，None使用精确集合，设置后使用固定内存的布隆过滤器
+    'url_filter_error_rate': 0.001,  # 布隆过滤器误判率
+    'frontier_max_size': 100000,  # 整站爬取时待爬取队列的最大长度
+    'circuit_breaker_threshold': 5,  # 同一主机连续失败多少次后熔断
+    'circuit_breaker_reset_timeout': 60,  # 熔断持续时间（秒），之后放行一个探测请求
+    'pagination_prefetch': 1,  # 分页爬取时同时抓取的页数（滑动窗口大小），1表示逐页顺序爬取
+    'pipeline_queue_size': 32,  # 流水线模式下等待解析和正在解析的页面数上限
+    'checkpoint_interval': 10,  # 启用断点时每爬取多少个页面保存一次进度
+    'work_queue_lease_timeout': 300,  # 共享队列中URL的租约时长（秒），工作进程崩溃后URL在租约过期后重新可领取
+    'work_queue_max_attempts': 3,  # 共享队列中URL最多被领取的次数，超过后标记为失败
+    'work_queue_poll_interval': 1,  # 队列暂时为空时工作进程的轮询间隔（秒）
+    'image_download_workers': 8,  # 同时下载图片的线程数
+    'download_chunk_size': 64 * 1024,  # 图片分块写入磁盘的大小（字节）
+    'max_body_bytes': 10 * 1024 * 1024,  # 流式获取页面时响应体的大小上限（字节），超过时停止下载，0表示不限
+    'stream_chunk_size': 16 * 1024,  # 流式获取页面时每次读取并解析的大小（字节），越小越早得到第一个结果
+    'stream_content_types': ('text/html', 'application/xhtml+xml'),  # 流式获取时允许解析的Content-Type
 }
 
 # 数据存储配置
 STORAGE_CONFIG = {
-    'save_format': 'json',  # 默认保存格式: json, csv, excel
+    'save_format': 'json',  # 默认保存格式: json, jsonl, csv, excel
     'data_dir': 'data',  # 数据存储目录
     'filename_prefix': 'scraped_data',  # 文件名前缀
+    'list_separator': ' | ',  # 保存CSV/Excel时列表字段（如多个段落、链接）的连接符，包含字典的字段保存为JSON文本
+}
+
+# HTTP缓存配置（重复爬取时利用ETag/Last-Modified发送条件请求）
+HTTP_CACHE_CONFIG = {
+    'enabled': True,  # 是否启用HTTP缓存
+    'cache_dir': 'http_cache',  # 缓存存储目录
+    'max_bytes': 200 * 1024 * 1024,  # 缓存总大小上限（200MB），超出时淘汰最久未使用的页面
+}
+
+# 图片仓库配置（按内容哈希保存图片，跨多次运行去重）
+IMAGE_STORE_CONFIG = {
+    'enabled': True,  # 是否启用图片仓库
+    'store_dir': 'image_store',  # 仓库目录，需与图片保存目录在同一磁盘上才能使用硬链接
+}
+
+# 图片过滤配置（下载时先检查Content-Length和文件头，跳过图标等小图和过大的文件，不符合时立即断开连接）
+IMAGE_FILTER_CONFIG = {
+    'enabled': True,  # 是否过滤图片
+    'min_width': 50,  # 最小宽度（像素），0表示不限
+    'min_height': 50,  # 最小高度（像素），0表示不限
+    'max_width': 0,  # 最大宽度（像素），0表示不限
+    'max_height': 0,  # 最大高度（像素），0表示不限
+    'min_bytes': 0,  # 最小文件大小（字节），0表示不限
+    'max_bytes': 20 * 1024 * 1024,  # 最大文件大小（字节），0表示不限
+    'allowed_formats': None,  # 允许的实际格式，如('png', 'jpeg')，None表示不限
+    'probe_bytes': 32 * 1024,  # 按格式或宽高过滤时最多读取图片开头的字节数来解析文件头，需要包含JPEG的EXIF等头部信息
+}
+
+# 连接配置
+CONNECTION_CONFIG = {
+    'max_connections_per_host': 4,  # 每个主机最多同时使用的连接数，超出时等待空闲连接
+    'max_host_pools': 100,  # 最多为多少个主机保留连接池
+    'dns_cache_ttl': 300,  # DNS解析结果的缓存时间（秒），0表示不缓存
+    'reuse_tls_sessions': True,  # 新建HTTPS连接时是否恢复之前的TLS会话，省去完整握手
+}
+
+# 运行指标配置（各阶段耗时直方图和请求计数，Prometheus文本格式）
+METRICS_CONFIG = {
+    'enabled': True,  # 是否统计各阶段耗时和请求计数
+    'export_file': 'logs/metrics.prom',  # 关闭爬虫时写入的Prometheus文本格式文件（None表示不写入）
+    'http_port': None,  # 指标HTTP端点端口（如9108，None表示不启动，0表示随机端口）
+    'http_host': '127.0.0.1',  # 指标HTTP端点监听地址
 }
 
 # 日志配置
@@ -38,6 +106,7 @@ LOGGING_CONFIG = {
     'log_dir': 'logs',  # 日志存储目录
     'log_file_max_bytes': 10 * 1024 * 1024,  # 单个日志文件最大大小（10MB）
     'backup_count': 5,  # 保留的备份日志文件数量
+    'url_log_sample_rate': 1.0,  # 逐URL的INFO日志（正在爬取、成功获取页面等）的记录比例，0.1表示约记录10%
 }
 
 # Selenium配置（如果使用）
@@ -46,4 +115,6 @@ SELENIUM_CONFIG = {
     'driver_path': '',  # WebDriver路径
     'headless': True,  # 是否使用无头模式
     'implicitly_wait': 5,  # 隐式等待时间（秒）
+    'pool_size': 2,  # 浏览器池中同时运行的浏览器数量
+    'max_pages_per_driver': 50,  # 每个浏览器加载多少个页面后重启（0表示不重启）
 }
\ No newline at end of file
@@ -1,150 +1,398 @@
 import requests
-from bs4 import BeautifulSoup
 import time
-import random
-from urllib.parse import urljoin, urlparse
-from fake_useragent import UserAgent
+from urllib.parse import urljoin, urlparse, urldefrag
 import re
 import json
 import os
-from utils.logger import crawler_logger
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from utils.logger import crawler_logger, url_logger, configure_logger
 from utils.data_storage import DataStorage
-from config import BASE_CONFIG, CRAWLER_SETTINGS, STORAGE_CONFIG, SELENIUM_CONFIG
+from utils.scheduler import HostScheduler
+from utils.html_parser import get_soup
+from utils.extraction import ExtractionPlan
+from utils.records import json_default
+from utils.parse_pool import parse_html, get_parse_mp_context
+from utils.browser_pool import BrowserPool
+from utils.frontier import URLFrontier, create_url_filter
+from utils.checkpoint import CrawlCheckpoint
+from utils.work_queue import WorkQueue
+from utils.http_cache import HTTPCache
+from utils.image_store import ImageStore
+from utils.image_probe import ImageFilter, ImageRejected, parse_image_header, content_range_total
+from utils.robots import RobotsCache
+from utils.retry import RetryPolicy, CircuitBreaker, CircuitOpenError
+from utils.metrics import CrawlerMetrics
+from utils.user_agents import UserAgentPool
+from utils.connection import ConnectionManager
+from utils.streaming import StreamingHTMLParser, charset_from_content_type, is_allowed_content_type
+from utils.image_download import build_image_filename, stream_to_temp_file, move_into_place
+from config import (BASE_CONFIG, CRAWLER_SETTINGS, STORAGE_CONFIG, SELENIUM_CONFIG,
+                    HTTP_CACHE_CONFIG, IMAGE_STORE_CONFIG, METRICS_CONFIG, LOGGING_CONFIG,
+                    CONNECTION_CONFIG, IMAGE_FILTER_CONFIG)
+
+# 请求图片时的Accept请求头
+IMAGE_ACCEPT = 'image/webp,image/apng,image/*,*/*;q=0.8'
+
 
 class WebCrawler:
     """基础网页爬虫类"""
     
     def __init__(self):
+        # 日志级别、轮转大小和逐URL日志的抽样比例
+        configure_logger(
+            crawler_logger,
+            level=LOGGING_CONFIG['log_level'],
+            log_dir=LOGGING_CONFIG['log_dir'],
+            max_bytes=LOGGING_CONFIG['log_file_max_bytes'],
+            backup_count=LOGGING_CONFIG['backup_count'],
+            url_log_sample_rate=LOGGING_CONFIG['url_log_sample_rate']
+        )
         self.session = requests.Session()
-        self.ua = UserAgent()
-        self.storage = DataStorage(STORAGE_CONFIG['data_dir'])
-        self.visited_urls = set()
+        # 本地User-Agent轮换池，配置了user_agents_file时从文件加载
+        if CRAWLER_SETTINGS['user_agents_file']:
+            self.ua = UserAgentPool.from_file(CRAWLER_SETTINGS['user_agents_file'])
+        else:
+            self.ua = UserAgentPool()
+        # 各阶段耗时和请求计数，可导出为Prometheus文本格式
+        self.metrics = CrawlerMetrics(enabled=METRICS_CONFIG['enabled'])
+        if METRICS_CONFIG['enabled'] and METRICS_CONFIG['http_port'] is not None:
+            port = self.metrics.start_http_server(METRICS_CONFIG['http_port'], METRICS_CONFIG['http_host'])
+            crawler_logger.info(f"指标端点已启动: http://{METRICS_CONFIG['http_host']}:{port}/metrics")
+        self.storage = DataStorage(STORAGE_CONFIG['data_dir'], metrics=self.metrics,
+                                   list_separator=STORAGE_CONFIG['list_separator'])
+        # 连接池大小与并发数一致，并限制每个主机的连接数；缓存DNS结果，复用TLS会话
+        self.connections = self._create_connection_manager(
+            max(CRAWLER_SETTINGS['concurrent_requests'], CRAWLER_SETTINGS['image_download_workers'])
+        )
+        # 已访问URL集合，配置了url_filter_capacity时使用固定内存的布隆过滤器
+        self.visited_urls = self._create_url_filter()
+        # 按主机控制请求间隔，不同主机的请求互不等待
+        self.scheduler = HostScheduler(
+            delay=CRAWLER_SETTINGS['download_delay'],
+            randomize=CRAWLER_SETTINGS['randomize_download_delay'],
+            image_delay=CRAWLER_SETTINGS['image_download_delay']
+        )
+        
+        # 临时错误重试策略和按主机的熔断器
+        self.retry_policy = RetryPolicy(
+            max_retries=BASE_CONFIG['max_retries'],
+            backoff_base=BASE_CONFIG['retry_backoff_base'],
+            backoff_max=BASE_CONFIG['retry_backoff_max']
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=CRAWLER_SETTINGS['circuit_breaker_threshold'],
+            reset_timeout=CRAWLER_SETTINGS['circuit_breaker_reset_timeout']
+        )
+        
+        # robots.txt缓存，其中的Crawl-delay会设置为对应主机的请求间隔
+        self.robots = None
+        if CRAWLER_SETTINGS['respect_robots_txt']:
+            self.robots = RobotsCache(
+                self._fetch_robots,
+                user_agent=CRAWLER_SETTINGS['robots_user_agent'],
+                ttl=CRAWLER_SETTINGS['robots_cache_ttl'],
+                scheduler=self.scheduler
+            )
+        
+        # 磁盘HTTP缓存，用于重复爬取时发送条件请求
+        self.http_cache = None
+        if HTTP_CACHE_CONFIG['enabled']:
+            self.http_cache = HTTPCache(HTTP_CACHE_CONFIG['cache_dir'], HTTP_CACHE_CONFIG['max_bytes'])
+        
+        # 内容寻址的图片仓库，跨多次运行对图片去重
+        self.image_store = None
+        if IMAGE_STORE_CONFIG['enabled']:
+            self.image_store = ImageStore(IMAGE_STORE_CONFIG['store_dir'])
+        
+        # 下载前探测图片大小和尺寸，跳过图标等小图和过大的文件
+        self.image_filter = None
+        if IMAGE_FILTER_CONFIG['enabled']:
+            self.image_filter = ImageFilter(
+                min_width=IMAGE_FILTER_CONFIG['min_width'],
+                min_height=IMAGE_FILTER_CONFIG['min_height'],
+                max_width=IMAGE_FILTER_CONFIG['max_width'],
+                max_height=IMAGE_FILTER_CONFIG['max_height'],
+                min_bytes=IMAGE_FILTER_CONFIG['min_bytes'],
+                max_bytes=IMAGE_FILTER_CONFIG['max_bytes'],
+                allowed_formats=IMAGE_FILTER_CONFIG['allowed_formats']
+            )
+        
+        # 编译好的字段提取计划，按选择器缓存
+        self._extraction_plans = {}
+        
+        # Selenium浏览器池，第一次使用时创建
+        self.browser_pool = None
+        self._browser_pool_lock = threading.Lock()
         
         # 设置请求头
         self.headers = BASE_CONFIG['headers'].copy()
         
         crawler_logger.info("爬虫初始化完成")
     
+    def _create_connection_manager(self, concurrency):
+        """按CONNECTION_CONFIG创建连接管理器并挂载到会话上"""
+        connections = ConnectionManager(
+            concurrency=concurrency,
+            max_per_host=CONNECTION_CONFIG['max_connections_per_host'],
+            max_host_pools=CONNECTION_CONFIG['max_host_pools'],
+            dns_ttl=CONNECTION_CONFIG['dns_cache_ttl'],
+            reuse_tls_sessions=CONNECTION_CONFIG['reuse_tls_sessions'],
+            metrics=self.metrics
+        )
+        connections.mount(self.session)
+        return connections
+    
+    @staticmethod
+    def _create_url_filter(urls=()):
+        """按CRAWLER_SETTINGS创建URL去重集合，并加入urls"""
+        url_filter = create_url_filter(CRAWLER_SETTINGS['url_filter_capacity'],
+                                       CRAWLER_SETTINGS['url_filter_error_rate'])
+        for url in urls:
+            url_filter.add(url)
+        return url_filter
+    
     def get_page(self, url, use_selenium=False):
-        """获取网页内容"""
+        """获取网页内容，失败时返回None"""
+        return self._fetch_page(url, use_selenium)[0]
+    
+    def _fetch_page(self, url, use_selenium=False, check_visited=True):
+        """获取网页内容，返回(response, 失败原因)
+        
+        成功时失败原因为None；失败时response为None，失败原因为HTTP状态码，
+        或'robots'（robots.txt禁止）、'visited'（已访问过）、'error'（请求异常或浏览器获取失败）
+        """
+        if not self._robots_allowed(url):
+            return None, 'robots'
+        
         if use_selenium:
-            return self._get_with_selenium(url)
+            response = self._get_with_selenium(url)
+            return response, None if response else 'error'
         
         # 检查URL是否已访问过
-        if url in self.visited_urls:
+        if check_visited and url in self.visited_urls:
             crawler_logger.warning(f"URL已访问过: {url}")
-            return None
+            return None, 'visited'
         
-        # 添加随机User-Agent
+        # 添加随机User-Agent（使用局部副本，避免并发请求之间互相覆盖请求头）
+        headers = self.headers.copy()
         if CRAWLER_SETTINGS['random_user_agent']:
-            self.headers['User-Agent'] = self.ua.random
+            headers['User-Agent'] = self.ua.random
         
         try:
-            # 随机延迟，避免被封
-            delay = random.uniform(*BASE_CONFIG['delay_range'])
-            time.sleep(delay)
+            # 有缓存时发送条件请求，页面未修改时服务器只返回304
+            if self.http_cache:
+                headers.update(self.http_cache.conditional_headers(url))
+            
+            response = self._request(url, headers)
+            
+            from_cache = False
+            if response.status_code == 304 and self.http_cache:
+                cached = self.http_cache.load(url, response)
+                if cached is not None:
+                    response = cached
+                    from_cache = True
             
-            response = self.session.get(
-                url, 
-                headers=self.headers, 
-                timeout=BASE_CONFIG['timeout']
-            )
             response.encoding = BASE_CONFIG['encoding']
             
             if response.status_code == 200:
                 self.visited_urls.add(url)
-                crawler_logger.info(f"成功获取页面: {url}")
-                return response
+                if from_cache:
+                    url_logger.info(f"页面未修改，使用缓存: {url}")
+                else:
+                    if self.http_cache:
+                        self.http_cache.store(response, url)
+                    url_logger.info(f"成功获取页面: {url}")
+                return response, None
             else:
                 crawler_logger.error(f"请求失败，状态码: {response.status_code}, URL: {url}")
-                return None
+                return None, response.status_code
                 
         except requests.exceptions.RequestException as e:
             crawler_logger.error(f"请求异常: {e}, URL: {url}")
-            return None
+            return None, 'error'
     
-    def _get_with_selenium(self, url):
-        """使用Selenium获取网页内容（用于JavaScript渲染的页面）"""
-        try:
-            from selenium import webdriver
-            from selenium.webdriver.chrome.options import Options
-            from webdriver_manager.chrome import ChromeDriverManager
-            from selenium.webdriver.chrome.service import Service
+    def _request(self, url, headers, stream=False, method='GET', kind='page'):
+        """发送请求（默认GET）
+        
+        按主机间隔调度（kind='image'时使用图片请求的间隔）；连接失败、超时、429和5xx按指数退避重试（最多max_retries次，优先使用Retry-After）；
+        主机连续失败后熔断，熔断期间直接抛出CircuitOpenError，不再占用超时时间
+        """
+        host = self.scheduler.host_key(url)
+        
+        for attempt in range(self.retry_policy.max_retries + 1):
+            if not self.circuit_breaker.allow(host):
+                raise CircuitOpenError(f"主机已熔断，暂停请求: {host}")
             
-            options = Options()
-            if SELENIUM_CONFIG.get('headless', True):
-                options.add_argument('--headless')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('user-agent=' + self.ua.random)
+            # 同一主机的请求保持间隔，避免被封
+            self.metrics.observe('queue_wait', self.scheduler.wait(url, kind), host)
             
-            # 使用webdriver-manager自动管理ChromeDriver
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=headers, timeout=BASE_CONFIG['timeout'],
+                                                stream=stream)
+            except requests.exceptions.RequestException as e:
+                self.metrics.inc('crawler_errors_total', host=host, error=type(e).__name__)
+                if not self.retry_policy.is_retryable_exception(e):
+                    # 重定向过多、URL无效等不能说明主机是否正常，不计入熔断，但要释放探测名额
+                    self.circuit_breaker.release(host)
+                    raise
+                self.circuit_breaker.record_failure(host)
+                if attempt >= self.retry_policy.max_retries:
+                    raise
+                self.metrics.inc('crawler_retries_total', host=host, reason=type(e).__name__)
+                delay = self.retry_policy.backoff(attempt)
+                crawler_logger.warning(f"请求异常，{delay:.1f} 秒后第 {attempt + 1} 次重试: {e}, URL: {url}")
+                time.sleep(delay)
+                continue
+            except Exception:
+                self.circuit_breaker.release(host)
+                raise
             
-            driver.implicitly_wait(SELENIUM_CONFIG.get('implicitly_wait', 10))
-            driver.get(url)
+            self._record_response(response, host, time.perf_counter() - start, stream)
             
-            html = driver.page_source
-            driver.quit()
+            if not self.retry_policy.is_retryable_status(response.status_code):
+                self.circuit_breaker.record_success(host)
+                return response
             
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html, 'html.parser')
+            # 429说明主机正常但要求限速，不计入熔断
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure(host)
+            else:
+                self.circuit_breaker.release(host)
+            if attempt >= self.retry_policy.max_retries:
+                return response
             
+            self.metrics.inc('crawler_retries_total', host=host, reason=str(response.status_code))
+            delay = self.retry_policy.backoff(attempt, response.headers.get('Retry-After'))
+            crawler_logger.warning(
+                f"状态码 {response.status_code}，{delay:.1f} 秒后第 {attempt + 1} 次重试, URL: {url}"
+            )
+            response.close()
+            time.sleep(delay)
+    
+    def _record_response(self, response, host, elapsed, stream):
+        """记录响应的首字节时间、响应体下载时间、状态码和字节数
+        
+        response.elapsed是发出请求到解析完响应头的时间；流式请求的响应体由调用方下载并记录
+        """
+        ttfb = response.elapsed.total_seconds()
+        self.metrics.observe('ttfb', ttfb, host)
+        self.metrics.inc('crawler_responses_total', host=host, status=str(response.status_code))
+        if not stream:
+            self.metrics.observe('body', max(0.0, elapsed - ttfb), host)
+            self.metrics.inc('crawler_bytes_total', len(response.content), host=host, kind='page')
+    
+    def _get_soup(self, response):
+        """获取响应的解析结果，第一次解析时记录解析耗时"""
+        if getattr(response, 'soup', None) is not None:
+            return response.soup
+        with self.metrics.time('parse', self.scheduler.host_key(response.url)):
+            return get_soup(response, CRAWLER_SETTINGS['html_parser'])
+    
+    def _fetch_robots(self, url):
+        """下载robots.txt，与页面请求使用相同的请求头、请求间隔、重试和熔断"""
+        headers = self.headers.copy()
+        if CRAWLER_SETTINGS['random_user_agent']:
+            headers['User-Agent'] = self.ua.random
+        return self._request(url, headers)
+    
+    def _robots_allowed(self, url):
+        """检查robots.txt是否允许抓取URL（未启用时总是允许）"""
+        if self.robots is None:
+            return True
+        try:
+            allowed = self.robots.allowed(url)
+        except Exception as e:
+            crawler_logger.warning(f"robots.txt检查异常: {e}, URL: {url}")
+            return True
+        if not allowed:
+            crawler_logger.warning(f"robots.txt禁止抓取: {url}")
+        return allowed
+    
+    def _get_browser_pool(self):
+        """获取浏览器池，第一次使用Selenium时才创建"""
+        with self._browser_pool_lock:
+            if self.browser_pool is None:
+                self.browser_pool = BrowserPool(
+                    size=SELENIUM_CONFIG.get('pool_size', 2),
+                    headless=SELENIUM_CONFIG.get('headless', True),
+                    implicitly_wait=SELENIUM_CONFIG.get('implicitly_wait', 10),
+                    driver_path=SELENIUM_CONFIG.get('driver_path', ''),
+                    max_pages_per_driver=SELENIUM_CONFIG.get('max_pages_per_driver', 50),
+                    user_agent_factory=lambda: self.ua.random
+                )
+            return self.browser_pool
+    
+    def _get_with_selenium(self, url):
+        """使用Selenium获取网页内容（用于JavaScript渲染的页面）"""
+        host = self.scheduler.host_key(url)
+        try:
+            # 从浏览器池中取出已启动的浏览器，避免每个URL都重新启动Chrome
+            start = time.perf_counter()
+            with self._get_browser_pool().acquire() as driver:
+                self.metrics.observe('queue_wait', time.perf_counter() - start, host)
+                with self.metrics.time('render', host):
+                    driver.get(url)
+                    html = driver.page_source
+            self.metrics.inc('crawler_responses_total', host=host, status='200')
+            self.metrics.inc('crawler_bytes_total', len(html.encode('utf-8')), host=host, kind='page')
+            
+            # 页面在首次被解析时才构建soup，并由各个提取方法共用
             return type('Response', (), {
                 'status_code': 200,
+                'url': url,
                 'text': html,
                 'content': html.encode('utf-8'),
-                'soup': soup
+                'soup': None
             })()
             
         except Exception as e:
+            self.metrics.inc('crawler_errors_total', host=host, error=type(e).__name__)
             crawler_logger.error(f"Selenium请求异常: {e}, URL: {url}")
             return None
     
     def parse_page(self, response, selectors):
-        """解析页面内容"""
+        """解析页面内容
+        
+        selectors可以是选择器字典，也可以是compile_selectors编译好的ExtractionPlan
+        """
         if not response:
             return None
         
-        # 如果response有soup属性（来自Selenium），则直接使用
-        if hasattr(response, 'soup'):
-            soup = response.soup
-        else:
-            soup = BeautifulSoup(response.text, 'html.parser')
-        
-        data = {}
-        
-        for field_name, selector in selectors.items():
-            elements = soup.select(selector)
-            if elements:
-                if len(elements) == 1:
-                    # 单个元素
-                    if field_name.endswith('_html'):
-                        data[field_name] = elements[0].prettify()
-                    elif field_name.endswith('_attrs'):
-                        data[field_name] = elements[0].attrs
-                    else:
-                        data[field_name] = elements[0].get_text(strip=True)
-                else:
-                    # 多个元素
-                    if field_name.endswith('_html'):
-                        data[field_name] = [elem.prettify() for elem in elements]
-                    elif field_name.endswith('_attrs'):
-                        data[field_name] = [elem.attrs for elem in elements]
-                    else:
-                        data[field_name] = [elem.get_text(strip=True) for elem in elements]
-            else:
-                data[field_name] = None
+        soup = self._get_soup(response)
+        
+        if not isinstance(selectors, ExtractionPlan):
+            selectors = self.compile_selectors(selectors)
         
-        return data
+        # 一次遍历文档树完成所有字段的匹配
+        with self.metrics.time('extract', self.scheduler.host_key(response.url)):
+            return selectors.extract(soup)
+    
+    def compile_selectors(self, selectors, html_mode=None):
+        """将选择器字典编译为提取计划，相同的选择器只编译一次
+        
+        html_mode: 'prettify'输出格式化的HTML，'raw'输出原始HTML（更快），默认读取CRAWLER_SETTINGS['html_output']；
+        CRAWLER_SETTINGS['compact_records']为True时提取结果为紧凑的PageRecord
+        """
+        if html_mode is None:
+            html_mode = CRAWLER_SETTINGS['html_output']
+        compact = CRAWLER_SETTINGS['compact_records']
+        
+        key = (tuple(selectors.items()), html_mode, compact)
+        plan = self._extraction_plans.get(key)
+        if plan is None:
+            plan = ExtractionPlan(selectors, html_mode, compact)
+            self._extraction_plans[key] = plan
+        return plan
     
     def extract_links(self, response, link_selector='a[href]'):
         """从页面中提取链接"""
         if not response:
             return []
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = self._get_soup(response)
         links = []
         
         for link in soup.select(link_selector):
@@ -166,7 +414,7 @@ class WebCrawler:
         if not response:
             return []
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = self._get_soup(response)
         images = []
         
         # 使用response.url，如果没有则使用response.request.url
@@ -192,81 +440,273 @@ class WebCrawler:
         path = parsed.path.lower()
         return path.endswith(('.png', '.jpg', '.jpeg'))
     
+    def iter_page_stream(self, url, max_links=None, max_images=None, max_bytes=None):
+        """流式获取页面，边下载边解析，每发现一个链接或图片就立即生成
+        
+        生成{'type': 'link', 'url': ...}和{'type': 'image', 'url': ..., 'alt': ..., 'title': ...}，筛选规则与
+        extract_links、extract_images相同。Content-Type不在CRAWLER_SETTINGS['stream_content_types']中、
+        或Content-Length超过max_bytes（默认CRAWLER_SETTINGS['max_body_bytes']）时不读取响应体；
+        实际读取超过max_bytes时停止下载，已找到的结果保留。
+        max_links、max_images为需要的数量（None表示不限，0表示不需要），都达到后立即断开连接；
+        调用方提前停止迭代时同样断开连接，不再下载剩余内容。不使用HTTP缓存
+        """
+        if max_bytes is None:
+            max_bytes = CRAWLER_SETTINGS['max_body_bytes']
+        
+        if url in self.visited_urls:
+            crawler_logger.warning(f"URL已访问过: {url}")
+            return
+        
+        if not self._robots_allowed(url):
+            return
+        
+        headers = self.headers.copy()
+        if CRAWLER_SETTINGS['random_user_agent']:
+            headers['User-Agent'] = self.ua.random
+        
+        try:
+            response = self._request(url, headers, stream=True)
+        except requests.exceptions.RequestException as e:
+            crawler_logger.error(f"请求异常: {e}, URL: {url}")
+            return
+        
+        with response:
+            if response.status_code != 200:
+                crawler_logger.error(f"请求失败，状态码: {response.status_code}, URL: {url}")
+                return
+            
+            content_type = response.headers.get('Content-Type', '')
+            if not is_allowed_content_type(content_type, CRAWLER_SETTINGS['stream_content_types']):
+                crawler_logger.warning(f"不是HTML页面，跳过: {content_type}, URL: {url}")
+                return
+            content_length = response.headers.get('Content-Length', '')
+            if max_bytes and content_length.isdigit() and int(content_length) > max_bytes:
+                crawler_logger.warning(f"页面大小 {content_length} 字节超过上限 {max_bytes}，跳过: {url}")
+                return
+            
+            self.visited_urls.add(url)
+            host = self.scheduler.host_key(url)
+            parser = StreamingHTMLParser(charset_from_content_type(content_type) or BASE_CONFIG['encoding'])
+            base_url = response.url
+            counts = {'link': 0, 'image': 0}
+            limits = {'link': max_links, 'image': max_images}
+            received = 0
+            parse_time = 0.0
+            start = time.perf_counter()
+            
+            def collect(tags):
+                nonlocal base_url
+                for tag, attrs in tags:
+                    if tag == 'base':
+                        if attrs.get('href') and base_url == response.url:
+                            base_url = urljoin(response.url, attrs['href'])
+                        continue
+                    kind = 'link' if tag == 'a' else 'image'
+                    if limits[kind] is not None and counts[kind] >= limits[kind]:
+                        continue
+                    if kind == 'link':
+                        href = attrs.get('href')
+                        full_url = urljoin(base_url, href) if href else None
+                        if full_url and self.is_valid_url(full_url):
+                            counts[kind] += 1
+                            yield {'type': 'link', 'url': full_url}
+                    else:
+                        src = attrs.get('src') or attrs.get('data-src')
+                        full_url = urljoin(base_url, src) if src else None
+                        if full_url and self.is_image_url(full_url):
+                            counts[kind] += 1
+                            yield {'type': 'image', 'url': full_url,
+                                   'alt': attrs.get('alt', ''), 'title': attrs.get('title', '')}
+            
+            def satisfied():
+                return all(limits[kind] is not None and counts[kind] >= limits[kind] for kind in limits)
+            
+            try:
+                finished = True
+                for chunk in response.iter_content(CRAWLER_SETTINGS['stream_chunk_size']):
+                    received += len(chunk)
+                    if max_bytes and received > max_bytes:
+                        crawler_logger.warning(f"页面超过 {max_bytes} 字节，停止下载: {url}")
+                        finished = False
+                        break
+                    parse_start = time.perf_counter()
+                    tags = parser.feed(chunk)
+                    parse_time += time.perf_counter() - parse_start
+                    yield from collect(tags)
+                    if satisfied():
+                        url_logger.info(f"已找到所需的链接和图片，提前结束下载（{received} 字节）: {url}")
+                        finished = False
+                        break
+                if finished:
+                    parse_start = time.perf_counter()
+                    tags = parser.close()
+                    parse_time += time.perf_counter() - parse_start
+                    yield from collect(tags)
+                    url_logger.info(f"流式获取页面完成: {url}")
+            except requests.exceptions.RequestException as e:
+                crawler_logger.error(f"下载页面内容异常: {e}, URL: {url}")
+            finally:
+                self.metrics.observe('body', max(0.0, time.perf_counter() - start - parse_time), host)
+                self.metrics.observe('parse', parse_time, host)
+                self.metrics.inc('crawler_bytes_total', received, host=host, kind='page')
+    
     def download_image(self, img_url, save_dir='images'):
-        """下载单张图片"""
+        """下载单张图片（分块写入临时文件，完成后再重命名为最终文件）
+        
+        启用图片仓库时，已下载过的URL直接跳过，内容相同的图片只保存一份，保存目录中的文件为硬链接；
+        启用图片过滤时边下载边检查：Content-Length和文件头（格式、宽高）不符合IMAGE_FILTER_CONFIG时立即断开连接，
+        不再下载剩余内容，符合时已读取的开头部分直接写入文件，每张图片只请求一次
+        """
         # 创建图片保存目录
-        if not os.path.exists(save_dir):
-            os.makedirs(save_dir)
+        os.makedirs(save_dir, exist_ok=True)
+        
+        if self.image_store:
+            stored = self.image_store.lookup_url(img_url)
+            if stored:
+                object_path, filename = stored
+                filepath = self.image_store.link(object_path, save_dir, filename)
+                url_logger.info(f"图片已下载过，跳过: {img_url} -> {filepath}")
+                return filepath
+        
+        if not self._robots_allowed(img_url):
+            return None
         
         try:
-            # 随机延时，避免被封
-            delay = random.uniform(*BASE_CONFIG['delay_range'])
-            time.sleep(delay)
-            
             # 添加适当的请求头
             headers = self.headers.copy()
-            headers['Accept'] = 'image/webp,image/apng,image/*,*/*;q=0.8'
+            headers['Accept'] = IMAGE_ACCEPT
             
-            response = self.session.get(img_url, headers=headers, timeout=BASE_CONFIG['timeout'])
+            response = self._request(img_url, headers, stream=True, kind='image')
             
-            if response.status_code == 200:
-                # 获取文件扩展名并生成文件名
-                parsed_url = urlparse(img_url)
-                filename = os.path.basename(parsed_url.path)
-                
-                # 如果URL中没有文件名，则使用UUID或时间戳
-                if not filename or '.' not in filename:
-                    ext = '.jpg'  # 默认扩展名
-                    if 'png' in response.headers.get('Content-Type', '').lower():
-                        ext = '.png'
-                    filename = f"image_{int(time.time())}_{random.randint(1000, 9999)}{ext}"
-                
-                filepath = os.path.join(save_dir, filename)
-                
-                # 如果文件已存在，添加数字后缀
-                counter = 1
-                original_filepath = filepath
-                while os.path.exists(filepath):
-                    name, ext = os.path.splitext(original_filepath)
-                    filepath = f"{name}_{counter}{ext}"
-                    counter += 1
-                
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                crawler_logger.info(f"图片下载成功: {img_url} -> {filepath}")
-                return filepath
-            else:
-                crawler_logger.error(f"图片下载失败，状态码: {response.status_code}, URL: {img_url}")
-                return None
+            with response:
+                if response.status_code == 200:
+                    host = self.scheduler.host_key(img_url)
+                    filename = build_image_filename(img_url, response.headers.get('Content-Type', ''))
+                    temp_dir = self.image_store.tmp_dir if self.image_store else save_dir
+                    with self.metrics.time('body', host):
+                        chunks = response.iter_content(CRAWLER_SETTINGS['download_chunk_size'])
+                        if self.image_filter:
+                            content_length = response.headers.get('Content-Length', '')
+                            _, chunks = self.image_filter.stream(
+                                chunks, int(content_length) if content_length.isdigit() else None,
+                                IMAGE_FILTER_CONFIG['probe_bytes']
+                            )
+                        temp_path, content_hash = stream_to_temp_file(response, temp_dir, chunks=chunks)
+                    self.metrics.inc('crawler_bytes_total', os.path.getsize(temp_path), host=host, kind='image')
+                    
+                    if self.image_store:
+                        object_path = self.image_store.add(temp_path, content_hash, img_url, filename)
+                        filepath = self.image_store.link(object_path, save_dir, filename)
+                    else:
+                        filepath = move_into_place(temp_path, save_dir, filename)
+                    
+                    url_logger.info(f"图片下载成功: {img_url} -> {filepath}")
+                    return filepath
+                else:
+                    crawler_logger.error(f"图片下载失败，状态码: {response.status_code}, URL: {img_url}")
+                    return None
                 
+        except ImageRejected as e:
+            # 大小、格式或宽高不符合IMAGE_FILTER_CONFIG，响应已关闭，不再下载剩余内容
+            self._log_image_rejection(img_url, e.reason, e.info)
+            return None
         except Exception as e:
             crawler_logger.error(f"图片下载异常: {e}, URL: {img_url}")
             return None
     
-    def download_images_from_page(self, url, save_dir='images', use_selenium=False):
-        """从指定页面下载所有PNG/JPG图片"""
+    def probe_image(self, img_url):
+        """不下载图片，只探测其信息，返回{'url', 'bytes', 'format', 'width', 'height'}，无法获取的值为None；请求失败时返回None
+        
+        download_image边下载边筛选，不使用本方法。需要按格式或宽高筛选时发送Range请求，只读取图片开头的IMAGE_FILTER_CONFIG['probe_bytes']字节，
+        从Content-Range得到文件大小，从文件头解析实际格式和宽高；只按文件大小筛选时只发送HEAD请求
+        """
+        headers = self.headers.copy()
+        headers['Accept'] = IMAGE_ACCEPT
+        host = self.scheduler.host_key(img_url)
+        info = {'url': img_url, 'bytes': None, 'format': None, 'width': None, 'height': None}
+        
+        try:
+            if self.image_filter is not None and not self.image_filter.needs_header:
+                response = self._request(img_url, headers, stream=True, method='HEAD', kind='image')
+                with response:
+                    if response.status_code != 200:
+                        return None
+                    content_length = response.headers.get('Content-Length', '')
+                    info['bytes'] = int(content_length) if content_length.isdigit() else None
+                return info
+            
+            probe_bytes = IMAGE_FILTER_CONFIG['probe_bytes']
+            headers['Range'] = f"bytes=0-{probe_bytes - 1}"
+            response = self._request(img_url, headers, stream=True, kind='image')
+            with response:
+                if response.status_code == 206:
+                    info['bytes'] = content_range_total(response.headers.get('Content-Range'))
+                elif response.status_code == 200:
+                    # 服务器不支持Range，只读取开头部分后断开
+                    content_length = response.headers.get('Content-Length', '')
+                    info['bytes'] = int(content_length) if content_length.isdigit() else None
+                else:
+                    return None
+                data = b''
+                for chunk in response.iter_content(probe_bytes):
+                    data += chunk
+                    if len(data) >= probe_bytes:
+                        break
+            self.metrics.inc('crawler_bytes_total', len(data), host=host, kind='probe')
+        except requests.exceptions.RequestException as e:
+            crawler_logger.warning(f"图片探测异常: {e}, URL: {img_url}")
+            return None
+        
+        header = parse_image_header(data[:probe_bytes])
+        if header:
+            info['format'], info['width'], info['height'] = header
+        else:
+            info['format'] = ''
+        return info
+    
+    def _log_image_rejection(self, img_url, reason, info):
+        """记录因不符合image_filter而跳过的图片"""
+        self.metrics.inc('crawler_images_skipped_total', host=self.scheduler.host_key(img_url), reason=reason)
+        size = f"{info['width']}x{info['height']}" if info['width'] is not None else '尺寸未知'
+        url_logger.info(f"跳过图片（{reason}，格式: {info['format'] or '未知'}，{size}，"
+                        f"{info['bytes']} 字节）: {img_url}")
+    
+    def download_images_from_page(self, url, save_dir='images', use_selenium=False, progress_callback=None):
+        """从指定页面并发下载所有PNG/JPG图片
+
+        progress_callback(完成数, 总数, 图片URL, 文件路径或None) 在每张图片处理完成后调用
+        """
         response = self.get_page(url, use_selenium)
         if not response:
             return []
         
         images = self.extract_images(response)
-        downloaded_files = []
+        total = len(images)
+        downloaded_files = [None] * total
+        crawler_logger.info(f"找到 {total} 个图片链接")
         
-        for img_info in images:
-            img_url = img_info['url']
-            crawler_logger.info(f"正在下载图片: {img_url}")
-            
-            filepath = self.download_image(img_url, save_dir)
-            if filepath:
-                downloaded_files.append({
-                    'url': img_url,
-                    'filepath': filepath,
-                    'alt': img_info['alt'],
-                    'title': img_info['title']
-                })
+        with ThreadPoolExecutor(max_workers=CRAWLER_SETTINGS['image_download_workers']) as executor:
+            futures = {
+                executor.submit(self.download_image, img_info['url'], save_dir): i
+                for i, img_info in enumerate(images)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                img_info = images[index]
+                filepath = future.result()
+                if filepath:
+                    downloaded_files[index] = {
+                        'url': img_info['url'],
+                        'filepath': filepath,
+                        'alt': img_info['alt'],
+                        'title': img_info['title']
+                    }
+                url_logger.info(f"图片下载进度: {done}/{total}")
+                if progress_callback:
+                    progress_callback(done, total, img_info['url'], filepath)
         
-        return downloaded_files
+        # 按页面中出现的顺序返回下载成功的图片
+        return [item for item in downloaded_files if item]
     
     def crawl_single_page(self, url, selectors, use_selenium=False):
         """爬取单个页面"""
@@ -276,42 +716,447 @@ class WebCrawler:
             return data
         return None
     
-    def crawl_multiple_pages(self, urls, selectors, use_selenium=False):
-        """爬取多个页面"""
-        results = []
+    def crawl_multiple_pages(self, urls, selectors, use_selenium=False, checkpoint=None):
+        """爬取多个页面
         
-        for i, url in enumerate(urls):
-            crawler_logger.info(f"正在爬取 ({i+1}/{len(urls)}): {url}")
+        指定checkpoint（断点文件路径前缀）时定期保存进度，中断后以相同参数再次调用或调用resume_crawl即可继续
+        """
+        return list(self.iter_crawl_multiple_pages(urls, selectors, use_selenium, checkpoint))
+    
+    def iter_crawl_multiple_pages(self, urls, selectors, use_selenium=False, checkpoint=None):
+        """逐个爬取多个页面，每完成一个页面就生成一条结果，不在内存中累积结果"""
+        checkpoint, state, resumed = self._open_checkpoint(
+            checkpoint, 'crawl_multiple_pages',
+            {'urls': urls, 'selectors': selectors, 'use_selenium': use_selenium},
+            visited=lambda state: urls[:state['position']]
+        )
+        yield from resumed
+        start = state['position'] if state else 0
+        
+        for i, url in enumerate(urls[start:], start):
+            url_logger.info(f"正在爬取 ({i+1}/{len(urls)}): {url}")
             data = self.crawl_single_page(url, selectors, use_selenium)
             
             if data:
                 data['source_url'] = url
-                results.append(data)
+                if checkpoint:
+                    checkpoint.append_result(data)
+                yield data
+            
+            if checkpoint and (i + 1) % CRAWLER_SETTINGS['checkpoint_interval'] == 0:
+                self._save_checkpoint(checkpoint, i + 1)
         
-        return results
+        if checkpoint:
+            self._save_checkpoint(checkpoint, len(urls), finished=True)
     
-    def crawl_with_pagination(self, base_url, selectors, max_pages=None, page_param='page', use_selenium=False):
+    def crawl_with_pagination(self, base_url, selectors, max_pages=None, page_param='page', use_selenium=False,
+                              checkpoint=None, prefetch=None):
         """带分页的爬取"""
+        return list(self.iter_crawl_with_pagination(base_url, selectors, max_pages, page_param,
+                                                    use_selenium, checkpoint, prefetch))
+    
+    def iter_crawl_with_pagination(self, base_url, selectors, max_pages=None, page_param='page',
+                                   use_selenium=False, checkpoint=None, prefetch=None):
+        """带分页的逐页爬取，每完成一页就生成一条结果，不在内存中累积结果
+        
+        prefetch（默认CRAWLER_SETTINGS['pagination_prefetch']）大于1时，同时抓取当前页之后的prefetch页，
+        每完成一页再预取下一页；结果仍按页码顺序生成，遇到没有数据的页面时取消尚未开始的预取，
+        已抓取的更后面的页面直接丢弃。同一主机的请求间隔（download_delay）仍然生效
+        """
         if max_pages is None:
             max_pages = CRAWLER_SETTINGS['max_pages']
+        if prefetch is None:
+            prefetch = CRAWLER_SETTINGS['pagination_prefetch']
+        
+        checkpoint, state, resumed = self._open_checkpoint(
+            checkpoint, 'crawl_with_pagination',
+            {'base_url': base_url, 'selectors': selectors, 'max_pages': max_pages,
+             'page_param': page_param, 'use_selenium': use_selenium},
+            # 预取的页面可能已在保存进度之后被访问，只把断点位置之前的页面视为已访问
+            visited=lambda state: (self._page_url(base_url, page_param, page)
+                                   for page in range(1, state['position']))
+        )
+        yield from resumed
+        start_page = state['position'] if state else 1
+        
+        def crawl_page(page):
+            url = self._page_url(base_url, page_param, page)
+            url_logger.info(f"正在爬取第 {page} 页: {url}")
+            return url, self.crawl_single_page(url, selectors, use_selenium)
+        
+        if prefetch > 1:
+            pages = self._iter_prefetched_pages(crawl_page, start_page, max_pages, prefetch)
+        else:
+            pages = ((page, *crawl_page(page)) for page in range(start_page, max_pages + 1))
         
-        results = []
+        try:
+            for page, url, data in pages:
+                if data:
+                    data['source_url'] = url
+                    data['page'] = page
+                    if checkpoint:
+                        checkpoint.append_result(data)
+                        if page % CRAWLER_SETTINGS['checkpoint_interval'] == 0:
+                            self._save_checkpoint(checkpoint, page + 1)
+                    yield data
+                else:
+                    # 如果某页没有数据，可能已经到达末页，停止爬取
+                    crawler_logger.info(f"第 {page} 页没有数据，停止爬取")
+                    break
+        finally:
+            pages.close()
+        
+        if checkpoint:
+            self._save_checkpoint(checkpoint, max_pages + 1, finished=True)
+    
+    @staticmethod
+    def _page_url(base_url, page_param, page):
+        """生成分页URL，base_url已带查询参数时用&连接"""
+        separator = '&' if '?' in base_url else '?'
+        return f"{base_url}{separator}{page_param}={page}"
+    
+    def _iter_prefetched_pages(self, crawl_page, start_page, max_pages, prefetch):
+        """以prefetch页为窗口并发抓取分页，按页码顺序生成(页码, URL, 结果)
         
-        for page in range(1, max_pages + 1):
-            url = f"{base_url}?{page_param}={page}" if '?' in base_url else f"{base_url}?{page_param}={page}"
-            crawler_logger.info(f"正在爬取第 {page} 页: {url}")
+        调用方停止迭代（关闭生成器）时取消尚未开始的抓取，并等待正在进行的抓取结束
+        """
+        executor = ThreadPoolExecutor(max_workers=prefetch)
+        futures = {}
+        next_page = start_page
+        try:
+            for page in range(start_page, max_pages + 1):
+                # 保持窗口内有prefetch页正在抓取或已抓取待返回
+                while next_page <= max_pages and next_page < page + prefetch:
+                    futures[next_page] = executor.submit(crawl_page, next_page)
+                    next_page += 1
+                url, data = futures.pop(page).result()
+                yield page, url, data
+        finally:
+            for future in futures.values():
+                future.cancel()
+            if futures:
+                crawler_logger.info(f"已取消或丢弃末页之后预取的 {len(futures)} 页")
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def crawl_site(self, start_urls, selectors, max_depth=2, max_pages=None, same_domain=True,
+                   link_selector='a[href]', priority=None, use_selenium=False, checkpoint=None):
+        """从起始页面出发，沿页面中的链接广度优先爬取整个站点
+        
+        priority为可选函数priority(url, depth)，返回值越小越先爬取；提供时按优先级爬取
+        """
+        return list(self.iter_crawl_site(start_urls, selectors, max_depth, max_pages, same_domain,
+                                         link_selector, priority, use_selenium, checkpoint))
+    
+    def iter_crawl_site(self, start_urls, selectors, max_depth=2, max_pages=None, same_domain=True,
+                        link_selector='a[href]', priority=None, use_selenium=False, checkpoint=None):
+        """逐页爬取整个站点，每完成一个页面就生成一条结果，不在内存中累积结果
+        
+        从断点恢复时先逐条生成断点中已完成的结果（从文件读取，不一次性载入内存）
+        """
+        if max_pages is None:
+            max_pages = CRAWLER_SETTINGS['max_pages']
+        if isinstance(start_urls, str):
+            start_urls = [start_urls]
+        
+        # priority是函数，无法写入断点文件，从断点恢复时需要重新传入
+        checkpoint, state, resumed = self._open_checkpoint(
+            checkpoint, 'crawl_site',
+            {'start_urls': start_urls, 'selectors': selectors, 'max_depth': max_depth,
+             'max_pages': max_pages, 'same_domain': same_domain,
+             'link_selector': link_selector, 'use_selenium': use_selenium}
+        )
+        yield from resumed
+        found = checkpoint.results_count if state else 0
+        
+        frontier = URLFrontier(
+            max_depth=max_depth,
+            max_size=CRAWLER_SETTINGS['frontier_max_size'],
+            seen=self._create_url_filter(),
+            use_priority=priority is not None
+        )
+        if state:
+            # 重放断点日志中的入队和出队操作，出队过的URL即已访问的URL
+            for url in frontier.replay(checkpoint.load_journal(state['journal_bytes'])):
+                self.visited_urls.add(url)
+            frontier.dropped = state['dropped']
+        if checkpoint:
+            frontier.journal = checkpoint.append_journal
+        if not state:
+            for url in start_urls:
+                url = urldefrag(url)[0]
+                frontier.push(url, 0, priority(url, 0) if priority else 0)
+        allowed_hosts = {urlparse(url).netloc for url in start_urls}
+        
+        processed = state['position'] if state else 0
+        while frontier and found < max_pages:
+            url, depth = frontier.pop()
+            url_logger.info(f"正在爬取 (深度 {depth}, 已完成 {found}, 队列 {len(frontier)}): {url}")
             
-            data = self.crawl_single_page(url, selectors, use_selenium)
+            response = self.get_page(url, use_selenium)
+            data = None
+            if response:
+                data = self.parse_page(response, selectors)
+                if data:
+                    data['source_url'] = url
+                    data['depth'] = depth
+                    found += 1
+                    if checkpoint:
+                        checkpoint.append_result(data)
+                
+                if depth < max_depth:
+                    for link in self.extract_links(response, link_selector):
+                        link = urldefrag(link)[0]
+                        if same_domain and urlparse(link).netloc not in allowed_hosts:
+                            continue
+                        frontier.push(link, depth + 1, priority(link, depth + 1) if priority else 0)
+            
+            processed += 1
+            if checkpoint and processed % CRAWLER_SETTINGS['checkpoint_interval'] == 0:
+                self._save_checkpoint(checkpoint, processed, {'dropped': frontier.dropped})
+            
+            # 页面中的链接已加入队列后再生成结果，调用方中途停止时队列状态完整
             if data:
-                data['source_url'] = url
-                data['page'] = page
-                results.append(data)
-            else:
-                # 如果某页没有数据，可能已经到达末页，停止爬取
-                crawler_logger.info(f"第 {page} 页没有数据，停止爬取")
-                break
+                yield data
+        
+        if frontier.dropped:
+            crawler_logger.warning(f"待爬取队列已满，丢弃了 {frontier.dropped} 个URL")
         
-        return results
+        if checkpoint:
+            self._save_checkpoint(checkpoint, processed, {'dropped': frontier.dropped}, finished=True)
+    
+    def crawl_with_pipeline(self, urls, selectors, use_selenium=False, fetch_workers=None, parse_workers=None,
+                            queue_size=None):
+        """流水线模式爬取多个页面，结果按urls的顺序返回，参数含义见iter_crawl_with_pipeline"""
+        results = sorted(self._iter_pipeline(urls, selectors, use_selenium, fetch_workers, parse_workers, queue_size),
+                         key=lambda item: item[0])
+        return [data for _, data in results]
+    
+    def iter_crawl_with_pipeline(self, urls, selectors, use_selenium=False, fetch_workers=None, parse_workers=None,
+                                 queue_size=None):
+        """流水线模式爬取多个页面，按完成顺序逐条生成结果
+        
+        抓取线程（fetch_workers个，默认concurrent_requests）只负责下载，下载好的页面经有界队列
+        交给解析进程池（parse_workers个，默认CPU核数）解析，网络和CPU可以同时保持忙碌。
+        queue_size限制排队等待解析和正在解析的页面数，避免解析跟不上时页面在内存中堆积
+        """
+        for _, data in self._iter_pipeline(urls, selectors, use_selenium, fetch_workers, parse_workers, queue_size):
+            yield data
+    
+    def _iter_pipeline(self, urls, selectors, use_selenium, fetch_workers, parse_workers, queue_size):
+        """流水线的实现，生成(URL序号, 结果)"""
+        if isinstance(selectors, ExtractionPlan):
+            html_mode = selectors.html_mode
+            compact = selectors.compact
+            selectors = selectors.selectors
+        else:
+            html_mode = CRAWLER_SETTINGS['html_output']
+            compact = CRAWLER_SETTINGS['compact_records']
+        fetch_workers = fetch_workers or CRAWLER_SETTINGS['concurrent_requests']
+        parse_workers = parse_workers or os.cpu_count() or 1
+        queue_size = queue_size or CRAWLER_SETTINGS['pipeline_queue_size']
+        
+        fetched = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        url_iter = enumerate(urls)
+        url_lock = threading.Lock()
+        total = len(urls)
+        
+        def put(item):
+            # 队列已满时等待解析进程消费，下游停止后直接放弃
+            while not stop.is_set():
+                try:
+                    fetched.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+        
+        def fetch_worker():
+            while not stop.is_set():
+                with url_lock:
+                    item = next(url_iter, None)
+                if item is None:
+                    return
+                i, url = item
+                url_logger.info(f"正在爬取 ({i+1}/{total}): {url}")
+                try:
+                    response = self.get_page(url, use_selenium)
+                except Exception as e:
+                    crawler_logger.error(f"页面抓取异常: {e}, URL: {url}")
+                    continue
+                if response:
+                    put((i, url, response.text))
+        
+        def fetch_stage():
+            threads = [threading.Thread(target=fetch_worker, daemon=True) for _ in range(fetch_workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            put(None)
+        
+        # 在启动抓取线程之前创建进程池；解析进程用forkserver/spawn启动，不从已有多个线程
+        # （抓取线程、日志线程）的进程中fork，避免子进程继承被其他线程持有的锁而死锁
+        executor = ProcessPoolExecutor(max_workers=parse_workers, mp_context=get_parse_mp_context())
+        pending = {}
+        fetching = True
+        try:
+            threading.Thread(target=fetch_stage, daemon=True).start()
+            while fetching or pending:
+                # 正在解析的页面达到上限或抓取已结束时，等待解析完成
+                if pending and (not fetching or len(pending) >= queue_size):
+                    done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                else:
+                    try:
+                        item = fetched.get(timeout=0.1)
+                    except queue.Empty:
+                        item = False
+                    if item is None:
+                        fetching = False
+                    elif item:
+                        i, url, html = item
+                        future = executor.submit(parse_html, html, selectors,
+                                                 CRAWLER_SETTINGS['html_parser'], html_mode, compact)
+                        pending[future] = (i, url)
+                    done = [future for future in pending if future.done()]
+                
+                for future in done:
+                    i, url = pending.pop(future)
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        crawler_logger.error(f"页面解析异常: {e}, URL: {url}")
+                        continue
+                    if data:
+                        data['source_url'] = url
+                        yield i, data
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def crawl_worker(self, work_queue, selectors, worker_id=None, max_depth=0, same_domain=True,
+                     link_selector='a[href]', use_selenium=False, batch_size=1, max_pages=None, wait_for_work=True):
+        """作为工作进程从共享队列领取URL爬取，结果提交到队列的结果表，返回本进程完成的页面数
+        
+        work_queue可以是WorkQueue或数据库路径。多个进程（可以在不同机器上）指向同一个队列时，
+        每个URL只会被一个进程领取，已入队的URL不会重复爬取。
+        max_depth大于0时，深度小于max_depth的页面中的链接会加入队列（same_domain时只加入同一主机的链接）。
+        wait_for_work为True时，队列暂时为空但其他进程仍有处理中的URL时会等待，直到整个队列完成
+        """
+        if isinstance(work_queue, str):
+            work_queue = WorkQueue(
+                work_queue,
+                lease_timeout=CRAWLER_SETTINGS['work_queue_lease_timeout'],
+                max_attempts=CRAWLER_SETTINGS['work_queue_max_attempts']
+            )
+        worker_id = worker_id or WorkQueue.new_worker_id()
+        if isinstance(selectors, dict):
+            selectors = self.compile_selectors(selectors)
+        crawler_logger.info(f"工作进程 {worker_id} 开始领取任务: {work_queue.path}")
+        
+        completed = 0
+        while max_pages is None or completed < max_pages:
+            tasks = work_queue.lease(worker_id, batch_size)
+            if not tasks:
+                if not wait_for_work or work_queue.is_finished():
+                    break
+                time.sleep(CRAWLER_SETTINGS['work_queue_poll_interval'])
+                continue
+            
+            for url, depth in tasks:
+                url_logger.info(f"工作进程 {worker_id} 正在爬取 (深度 {depth}): {url}")
+                try:
+                    # 队列本身就是共享的已访问集合，租约过期后重新领取的URL需要再次抓取
+                    response, reason = self._fetch_page(url, use_selenium, check_visited=False)
+                    if not response:
+                        # robots.txt禁止和4xx（408、429除外）重试也不会成功，直接标记为失败
+                        permanent = reason == 'robots' or (
+                            isinstance(reason, int) and 400 <= reason < 500 and reason not in (408, 429)
+                        )
+                        work_queue.fail(url, worker_id, f'页面获取失败: {reason}', permanent=permanent)
+                        continue
+                    data = self.parse_page(response, selectors)
+                    
+                    links = []
+                    if depth < max_depth:
+                        host = urlparse(url).netloc
+                        for link in self.extract_links(response, link_selector):
+                            link = urldefrag(link)[0]
+                            if not same_domain or urlparse(link).netloc == host:
+                                links.append(link)
+                except Exception as e:
+                    crawler_logger.error(f"页面处理异常: {e}, URL: {url}")
+                    work_queue.fail(url, worker_id, e)
+                    continue
+                
+                if data:
+                    data['source_url'] = url
+                    data['depth'] = depth
+                if work_queue.complete(url, worker_id, data or None, links, depth + 1):
+                    completed += 1
+                else:
+                    crawler_logger.warning(f"租约已过期，结果被丢弃: {url}")
+        
+        crawler_logger.info(f"工作进程 {worker_id} 结束，完成 {completed} 个页面，队列状态: {work_queue.counts()}")
+        return completed
+    
+    def _open_checkpoint(self, checkpoint, method, kwargs, visited=None):
+        """打开断点，返回(checkpoint, state, 已完成结果的迭代器)
+        
+        断点中有同一方法、相同参数的未完成进度时，重建已访问URL集合并读取已完成的结果；
+        参数不同（如换了一组URL）时开始新任务。resume_crawl打开的断点沿用其中保存的任务，不比较参数。
+        断点不保存已访问URL集合，visited为可选函数visited(state)，返回断点位置之前已访问的URL
+        """
+        if checkpoint is None:
+            return None, None, iter(())
+        if isinstance(checkpoint, str):
+            checkpoint = CrawlCheckpoint(checkpoint)
+        if isinstance(kwargs.get('selectors'), ExtractionPlan):
+            kwargs = dict(kwargs, selectors=kwargs['selectors'].selectors)
+        
+        job = checkpoint.load_job()
+        state = checkpoint.load_state()
+        if job and state and job['method'] == method and not checkpoint.resuming:
+            # 断点文件中的参数是JSON，转换后再比较（元组保存后为列表）
+            if job['kwargs'] != json.loads(json.dumps(kwargs, ensure_ascii=False)):
+                crawler_logger.warning(f"断点中的任务参数与本次调用不同，开始新任务: {checkpoint.path}")
+                state = None
+        if job and state and job['method'] == method:
+            self.visited_urls = self._create_url_filter(visited(state) if visited else ())
+            resumed = checkpoint.load_results(state['results_count'])
+            crawler_logger.info(f"从断点恢复: {checkpoint.path}，已有 {checkpoint.results_count} 条结果")
+            return checkpoint, state, resumed
+        
+        checkpoint.start(method, kwargs)
+        return checkpoint, None, iter(())
+    
+    def _save_checkpoint(self, checkpoint, position, extra=None, finished=False):
+        """保存爬取进度"""
+        checkpoint.save(position, extra, finished)
+        if finished:
+            checkpoint.close()
+            crawler_logger.info(f"爬取完成，断点已更新: {checkpoint.path}")
+    
+    def resume_crawl(self, checkpoint, **kwargs):
+        """从断点继续之前中断的爬取任务，kwargs可覆盖原任务参数（如crawl_site的priority）"""
+        if isinstance(checkpoint, str):
+            checkpoint = CrawlCheckpoint(checkpoint)
+        
+        job = checkpoint.load_job()
+        if job is None:
+            crawler_logger.error(f"断点不存在: {checkpoint.path}")
+            return []
+        
+        state = checkpoint.load_state(include_finished=True)
+        if state and state['finished']:
+            crawler_logger.info(f"任务已完成，直接读取断点中的结果: {checkpoint.path}")
+            results = list(checkpoint.load_results(state['results_count']))
+            checkpoint.close()
+            return results
+        
+        job_kwargs = dict(job['kwargs'])
+        job_kwargs.update(kwargs)
+        checkpoint.resuming = True
+        return getattr(self, job['method'])(checkpoint=checkpoint, **job_kwargs)
     
     def save_data(self, data, format_type=None):
         """保存数据"""
@@ -320,6 +1165,8 @@ class WebCrawler:
         
         if format_type.lower() == 'json':
             return self.storage.save_to_json(data)
+        elif format_type.lower() == 'jsonl':
+            return self.storage.save_to_jsonl(data)
         elif format_type.lower() == 'csv':
             return self.storage.save_to_csv(data)
         elif format_type.lower() == 'excel':
@@ -327,6 +1174,38 @@ class WebCrawler:
         else:
             crawler_logger.warning(f"不支持的保存格式: {format_type}，使用默认JSON格式")
             return self.storage.save_to_json(data)
+    
+    def export_metrics(self, path=None):
+        """将运行指标写入Prometheus文本格式文件，默认路径为METRICS_CONFIG['export_file']"""
+        path = path or METRICS_CONFIG['export_file']
+        if not path:
+            return None
+        self.metrics.write_textfile(path)
+        crawler_logger.info(f"运行指标已导出到: {path}")
+        return path
+    
+    def close(self):
+        """释放爬虫占用的资源（浏览器池、图片仓库索引、会话连接），配置了导出文件时写入最终指标"""
+        if self.metrics.enabled and METRICS_CONFIG['export_file']:
+            self.export_metrics()
+        self.metrics.stop_http_server()
+        if self.browser_pool is not None:
+            self.browser_pool.close()
+        if self.image_store is not None:
+            self.image_store.close()
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def run_queue_worker(queue_path, selectors, **kwargs):
+    """在新的爬虫实例中运行crawl_worker，可作为multiprocessing / ProcessPoolExecutor的目标函数"""
+    with WebCrawler() as crawler:
+        return crawler.crawl_worker(queue_path, selectors, **kwargs)
 
 
 def main():
@@ -348,7 +1227,7 @@ def main():
     data = crawler.crawl_single_page(url, selectors, use_selenium=True)
     
     if data:
-        print("爬取的数据:", json.dumps(data, ensure_ascii=False, indent=2))
+        print("爬取的数据:", json.dumps(data, ensure_ascii=False, indent=2, default=json_default))
         
         # 保存数据
         file_path = crawler.save_data([data], 'json')
@@ -360,6 +1239,9 @@ def main():
     print("\n开始下载页面中的PNG/JPG图片...")
     image_results = crawler.download_images_from_page(url, save_dir='images', use_selenium=True)
     print(f"共下载了 {len(image_results)} 张图片")
+    
+    # 关闭浏览器池
+    crawler.close()
 
 
 if __name__ == "__main__":
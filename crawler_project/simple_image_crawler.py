@@ -8,11 +8,14 @@
 import requests
 from bs4 import BeautifulSoup
 import time
-import random
 from urllib.parse import urljoin, urlparse
 import os
 import json
-from fake_useragent import UserAgent
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.scheduler import HostScheduler
+from utils.user_agents import UserAgentPool
+from utils.connection import ConnectionManager
+from utils.image_download import build_image_filename, stream_to_temp_file, move_into_place
 
 
 class SimpleImageCrawler:
@@ -20,7 +23,12 @@ class SimpleImageCrawler:
     
     def __init__(self):
         self.session = requests.Session()
-        self.ua = UserAgent()
+        # 连接池与下载线程数一致，缓存DNS结果并复用TLS会话
+        self.connections = ConnectionManager(concurrency=8)
+        self.connections.mount(self.session)
+        self.ua = UserAgentPool()
+        # 同一主机的页面请求间隔1~3秒，不同主机之间互不等待；图片请求不与页面排队，间隔0.1~0.3秒
+        self.scheduler = HostScheduler(delay=2, randomize=True, image_delay=0.2)
         
         # 设置请求头
         self.headers = {
@@ -41,9 +49,8 @@ class SimpleImageCrawler:
         headers['User-Agent'] = self.ua.random
         
         try:
-            # 随机延迟，避免被封
-            delay = random.uniform(1, 3)
-            time.sleep(delay)
+            # 同一主机的请求保持间隔，避免被封
+            self.scheduler.wait(url)
             
             response = self.session.get(
                 url, 
@@ -95,82 +102,68 @@ class SimpleImageCrawler:
         return path.endswith(('.png', '.jpg', '.jpeg'))
     
     def download_image(self, img_url, save_dir='images'):
-        """下载单张图片"""
+        """下载单张图片（分块写入临时文件，完成后再重命名为最终文件）"""
         # 创建图片保存目录
-        if not os.path.exists(save_dir):
-            os.makedirs(save_dir)
+        os.makedirs(save_dir, exist_ok=True)
         
         try:
-            # 随机延时，避免被封
-            delay = random.uniform(1, 3)
-            time.sleep(delay)
+            # 同一主机的请求保持间隔，避免被封
+            self.scheduler.wait(img_url, 'image')
             
             # 添加适当的请求头
             headers = self.headers.copy()
             headers['Accept'] = 'image/webp,image/apng,image/*,*/*;q=0.8'
             
-            response = self.session.get(img_url, headers=headers, timeout=10)
+            response = self.session.get(img_url, headers=headers, timeout=10, stream=True)
             
-            if response.status_code == 200:
-                # 获取文件扩展名并生成文件名
-                parsed_url = urlparse(img_url)
-                filename = os.path.basename(parsed_url.path)
-                
-                # 如果URL中没有文件名，则使用时间戳
-                if not filename or '.' not in filename:
-                    ext = '.jpg'  # 默认扩展名
-                    if 'png' in response.headers.get('Content-Type', '').lower():
-                        ext = '.png'
-                    filename = f"image_{int(time.time())}_{random.randint(1000, 9999)}{ext}"
-                
-                filepath = os.path.join(save_dir, filename)
-                
-                # 如果文件已存在，添加数字后缀
-                counter = 1
-                original_filepath = filepath
-                while os.path.exists(filepath):
-                    name, ext = os.path.splitext(original_filepath)
-                    filepath = f"{name}_{counter}{ext}"
-                    counter += 1
-                
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                print(f"图片下载成功: {img_url} -> {filepath}")
-                return filepath
-            else:
-                print(f"图片下载失败，状态码: {response.status_code}, URL: {img_url}")
-                return None
+            with response:
+                if response.status_code == 200:
+                    filename = build_image_filename(img_url, response.headers.get('Content-Type', ''))
+                    temp_path, _ = stream_to_temp_file(response, save_dir)
+                    filepath = move_into_place(temp_path, save_dir, filename)
+                    
+                    print(f"图片下载成功: {img_url} -> {filepath}")
+                    return filepath
+                else:
+                    print(f"图片下载失败，状态码: {response.status_code}, URL: {img_url}")
+                    return None
                 
         except Exception as e:
             print(f"图片下载异常: {e}, URL: {img_url}")
             return None
     
-    def download_images_from_page(self, url, save_dir='images'):
-        """从指定页面下载所有PNG/JPG图片"""
+    def download_images_from_page(self, url, save_dir='images', max_workers=8):
+        """从指定页面并发下载所有PNG/JPG图片"""
         response = self.get_page(url)
         if not response:
             return []
         
         images = self.extract_images(response)
-        downloaded_files = []
+        total = len(images)
+        downloaded_files = [None] * total
         
-        print(f"找到 {len(images)} 个图片链接")
+        print(f"找到 {total} 个图片链接")
         
-        for i, img_info in enumerate(images):
-            img_url = img_info['url']
-            print(f"正在下载图片 {i+1}/{len(images)}: {img_url}")
-            
-            filepath = self.download_image(img_url, save_dir)
-            if filepath:
-                downloaded_files.append({
-                    'url': img_url,
-                    'filepath': filepath,
-                    'alt': img_info['alt'],
-                    'title': img_info['title']
-                })
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.download_image, img_info['url'], save_dir): i
+                for i, img_info in enumerate(images)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                img_info = images[index]
+                filepath = future.result()
+                if filepath:
+                    downloaded_files[index] = {
+                        'url': img_info['url'],
+                        'filepath': filepath,
+                        'alt': img_info['alt'],
+                        'title': img_info['title']
+                    }
+                print(f"下载进度 {done}/{total}: {img_info['url']}")
         
-        return downloaded_files
+        # 按页面中出现的顺序返回下载成功的图片
+        return [item for item in downloaded_files if item]
 
 
 def main():
@@ -0,0 +1,157 @@
+import atexit
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from utils.logger import crawler_logger
+
+
+class BrowserPool:
+    """可复用的无头浏览器池
+
+    浏览器在第一次使用时启动，之后在多次请求之间复用；取出前做健康检查，
+    每个浏览器加载max_pages_per_driver个页面后自动重启，程序退出时统一关闭
+    """
+
+    def __init__(self, size=2, headless=True, implicitly_wait=5, driver_path='',
+                 max_pages_per_driver=50, user_agent_factory=None):
+        self.size = max(1, int(size))
+        self.headless = headless
+        self.implicitly_wait = implicitly_wait
+        self.driver_path = driver_path
+        self.max_pages_per_driver = max_pages_per_driver
+        self.user_agent_factory = user_agent_factory
+
+        # 空闲浏览器和已启动（含正在启动）的浏览器数由_cond保护
+        self._idle = deque()
+        self._page_counts = {}
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _resolve_driver_path(self):
+        """获取ChromeDriver路径，webdriver-manager只在第一次启动时调用"""
+        with self._lock:
+            if not self.driver_path:
+                from webdriver_manager.chrome import ChromeDriverManager
+                self.driver_path = ChromeDriverManager().install()
+            return self.driver_path
+
+    def _launch(self):
+        """启动一个新的浏览器"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
+        options = Options()
+        if self.headless:
+            options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        if self.user_agent_factory:
+            options.add_argument('user-agent=' + self.user_agent_factory())
+
+        service = Service(self._resolve_driver_path())
+        driver = webdriver.Chrome(service=service, options=options)
+        driver.implicitly_wait(self.implicitly_wait)
+        crawler_logger.info("浏览器已启动")
+        return driver
+
+    def _is_healthy(self, driver):
+        """检查浏览器是否仍可用"""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        """关闭并丢弃一个浏览器，空出的名额由等待中的线程启动新浏览器"""
+        self._page_counts.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            crawler_logger.warning(f"关闭浏览器异常: {e}")
+        finally:
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _checkout(self, timeout=None):
+        """从池中取出一个健康的浏览器，池未满时启动新浏览器
+
+        没有空闲浏览器且池已满时等待，直到有浏览器归还或被丢弃（空出启动新浏览器的名额）；
+        指定timeout时超时抛出TimeoutError
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("浏览器池已关闭")
+                    if self._idle:
+                        driver = self._idle.popleft()
+                        launch = False
+                        break
+                    if self._created < self.size:
+                        self._created += 1
+                        launch = True
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("等待空闲浏览器超时")
+                    self._cond.wait(remaining)
+
+            if launch:
+                try:
+                    driver = self._launch()
+                except Exception:
+                    self._release_slot()
+                    raise
+                self._page_counts[id(driver)] = 0
+                return driver
+
+            if self._is_healthy(driver):
+                return driver
+            crawler_logger.warning("浏览器健康检查失败，重新启动")
+            self._discard(driver)
+
+    def _checkin(self, driver):
+        """归还浏览器，达到页面上限或已不可用时关闭"""
+        count = self._page_counts.get(id(driver), 0) + 1
+        self._page_counts[id(driver)] = count
+
+        if self._closed or not self._is_healthy(driver):
+            self._discard(driver)
+        elif self.max_pages_per_driver and count >= self.max_pages_per_driver:
+            crawler_logger.info(f"浏览器已加载 {count} 个页面，重启以释放资源")
+            self._discard(driver)
+        else:
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """取出一个浏览器，使用完毕后自动归还"""
+        driver = self._checkout(timeout)
+        try:
+            yield driver
+        finally:
+            self._checkin(driver)
+
+    def close(self):
+        """关闭池中所有浏览器，正在使用的浏览器在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            drivers = list(self._idle)
+            self._idle.clear()
+            # 唤醒等待中的线程，让其抛出异常
+            self._cond.notify_all()
+        for driver in drivers:
+            self._discard(driver)
@@ -0,0 +1,157 @@
+import json
+import os
+from utils.records import to_json_line
+
+
+def atomic_write_json(filepath, data):
+    """先写入临时文件并落盘，再原子替换目标文件，进程崩溃时不会留下写了一半的文件"""
+    temp_path = filepath + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, filepath)
+
+
+class CrawlCheckpoint:
+    """爬取断点：定期保存爬取进度，进程中断后可以从断点继续
+
+    path为断点文件的路径前缀，会生成以下文件：
+    - <path>.job.json       任务参数（爬取方法和调用参数），任务开始时写入一次
+    - <path>.state.json     爬取进度（位置、结果条数、日志长度），每次保存时整体替换，大小固定
+    - <path>.results.jsonl  已完成的结果，每行一条
+    - <path>.journal.jsonl  追加写入的操作日志（如整站爬取时待爬取队列的入队和出队），恢复时按顺序重放
+
+    已访问URL集合不写入断点，恢复时由位置或日志重建，每次保存只需写入新增的内容
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.job_file = path + '.job.json'
+        self.state_file = path + '.state.json'
+        self.results_file = path + '.results.jsonl'
+        self.journal_file = path + '.journal.jsonl'
+        self.results_count = 0
+        # resume_crawl继续断点中保存的任务时为True，不再与调用参数比较
+        self.resuming = False
+        self._results = None
+        self._journal = None
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def load_job(self):
+        """读取任务参数，不存在时返回None"""
+        if not os.path.exists(self.job_file):
+            return None
+        with open(self.job_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_state(self, include_finished=False):
+        """读取任务进度，不存在时返回None；任务已完成且include_finished为False时也返回None"""
+        if not os.path.exists(self.state_file):
+            return None
+        with open(self.state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('finished') and not include_finished:
+            return None
+        return state
+
+    def start(self, method, kwargs):
+        """开始新任务，清除旧的进度和结果"""
+        self.close()
+        atomic_write_json(self.job_file, {'method': method, 'kwargs': kwargs})
+        for filepath in (self.state_file, self.journal_file):
+            if os.path.exists(filepath):
+                os.remove(filepath)
+        self._results = open(self.results_file, 'w', encoding='utf-8')
+        self.results_count = 0
+
+    def load_results(self, count):
+        """保留前count条已保存的结果，丢弃最后一次保存进度之后追加的结果，返回结果的迭代器"""
+        self.close()
+        kept = 0
+        valid_bytes = 0
+        if os.path.exists(self.results_file):
+            with open(self.results_file, 'rb') as f:
+                for line in f:
+                    if kept >= count or not line.endswith(b'\n'):
+                        break
+                    kept += 1
+                    valid_bytes += len(line)
+
+        # 截断到最后一次保存进度时的位置，这之后的页面会重新爬取
+        self._results = open(self.results_file, 'a+', encoding='utf-8')
+        self._results.truncate(valid_bytes)
+        self.results_count = kept
+        return self.iter_results(kept)
+
+    def iter_results(self, count=None):
+        """逐条读取已保存的结果，不会一次性载入内存"""
+        if not os.path.exists(self.results_file):
+            return
+        with open(self.results_file, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                if count is not None and i >= count:
+                    break
+                yield json.loads(line)
+
+    def append_result(self, record):
+        """追加一条结果"""
+        self._results.write(to_json_line(record) + '\n')
+        self.results_count += 1
+
+    def append_journal(self, entry):
+        """向操作日志追加一条记录，第一次追加时打开日志文件"""
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def load_journal(self, size):
+        """丢弃最后一次保存进度之后追加的日志（保留前size字节），返回保留的记录的迭代器"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r+', encoding='utf-8') as f:
+                f.truncate(size)
+        return self._iter_journal()
+
+    def _iter_journal(self):
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def save(self, position, extra=None, finished=False):
+        """保存当前进度（先将结果和日志落盘，再原子替换进度文件）"""
+        for f in (self._results, self._journal):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+
+        state = {
+            'position': position,
+            'results_count': self.results_count,
+            'journal_bytes': self._journal_size(),
+            'finished': finished,
+        }
+        if extra:
+            state.update(extra)
+        atomic_write_json(self.state_file, state)
+
+    def _journal_size(self):
+        """操作日志的当前长度（字节）"""
+        if os.path.exists(self.journal_file):
+            return os.path.getsize(self.journal_file)
+        return 0
+
+    def close(self):
+        """关闭结果文件和日志文件"""
+        for f in (self._results, self._journal):
+            if f is not None:
+                f.close()
+        self._results = None
+        self._journal = None
@@ -0,0 +1,281 @@
+import socket
+import ssl
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.ssl_ import resolve_cert_reqs
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class DNSCache:
+    """带过期时间的DNS缓存，同一主机在ttl秒内只解析一次"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port):
+        """解析主机名，返回可连接的地址列表[(family, sockaddr), ...]"""
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry and entry[1] > time.monotonic():
+            with self._lock:
+                self.hits += 1
+            return entry[0]
+
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        addresses = [(family, sockaddr) for family, _, _, _, sockaddr in infos]
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (addresses, time.monotonic() + self.ttl)
+        return addresses
+
+    def invalidate(self, host, port):
+        """删除缓存的解析结果（缓存的地址全部连接失败时调用）"""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class TLSSessionContext(ssl.SSLContext):
+    """按主机和端口保存TLS会话的SSLContext，新连接同一主机时恢复会话，省去完整握手"""
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True, suppress_ragged_eofs=True,
+                    server_hostname=None, session=None):
+        key = None
+        if server_hostname and self.reuse_sessions and not server_side:
+            try:
+                key = (server_hostname, sock.getpeername()[1])
+            except (OSError, AttributeError, IndexError):
+                key = None
+        if session is None and key:
+            session = self.sessions.get(key)
+        ssl_sock = super().wrap_socket(
+            sock, server_side=server_side, do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs, server_hostname=server_hostname, session=session
+        )
+        if key and session is not None and not ssl_sock.session_reused:
+            # 会话已过期，服务器做了完整握手
+            self.sessions.pop(key, None)
+        return ssl_sock
+
+    def save_session(self, server_hostname, port, ssl_sock):
+        """保存连接的TLS会话（TLS 1.3的会话票据在握手后才收到，读取响应后再保存）"""
+        if not self.reuse_sessions or not server_hostname:
+            return
+        if getattr(ssl_sock, 'context', None) is not self:
+            return
+        try:
+            session = ssl_sock.session
+        except (AttributeError, ValueError, OSError):
+            return
+        if session is not None:
+            self.sessions[(server_hostname, port)] = session
+
+
+def create_tls_context(reuse_sessions=True):
+    """创建与urllib3默认设置一致的TLSSessionContext（TLS 1.2及以上、校验证书和主机名）"""
+    context = TLSSessionContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.options |= ssl.OP_NO_COMPRESSION
+    if getattr(context, 'post_handshake_auth', None) is not None:
+        context.post_handshake_auth = True
+    context.verify_mode = ssl.CERT_REQUIRED
+    context.check_hostname = True
+    context.hostname_checks_common_name = False
+    context.reuse_sessions = reuse_sessions
+    context.sessions = {}
+    return context
+
+
+class ConnectionManager:
+    """爬虫的连接管理
+
+    - 连接池大小与并发数一致，每个主机最多max_per_host个连接，超出时等待空闲连接
+    - DNS解析结果缓存ttl秒
+    - HTTPS连接复用TLS会话；每组CA证书（ca_certs, ca_cert_dir）使用单独的SSLContext，
+      证书只在创建时加载一次，不同请求的CA设置互不影响
+    - 统计连接池命中（复用已有连接）/未命中（新建连接）、DNS缓存和TLS会话恢复次数，
+      传入metrics时记录connect（TCP连接）和tls（TLS握手）阶段耗时
+    """
+
+    def __init__(self, concurrency=8, max_per_host=None, max_host_pools=100, dns_ttl=300,
+                 reuse_tls_sessions=True, metrics=None):
+        self.concurrency = max(1, int(concurrency))
+        self.max_per_host = max(1, min(self.concurrency, max_per_host or self.concurrency))
+        self.max_host_pools = max(self.concurrency, max_host_pools)
+        self.dns_cache = DNSCache(dns_ttl) if dns_ttl else None
+        # 设置到连接池上的SSLContext，只作为标记：建立连接时按连接的CA证书换成对应的SSLContext
+        self.tls_context = create_tls_context(reuse_tls_sessions)
+        self._tls_contexts = {}
+        self._tls_lock = threading.Lock()
+        self.metrics = metrics
+        self._stats = {'pool_hits': 0, 'pool_misses': 0, 'tls_handshakes': 0, 'tls_resumed': 0}
+        self._lock = threading.Lock()
+        self._connection_classes = self._build_connection_classes()
+
+    def get_tls_context(self, ca_certs=None, ca_cert_dir=None):
+        """获取加载了指定CA证书的SSLContext（都为None时使用系统默认证书），同一组CA证书共用一个"""
+        key = (ca_certs, ca_cert_dir)
+        context = self._tls_contexts.get(key)
+        if context is None:
+            with self._tls_lock:
+                context = self._tls_contexts.get(key)
+                if context is None:
+                    context = create_tls_context(self.tls_context.reuse_sessions)
+                    if ca_certs or ca_cert_dir:
+                        context.load_verify_locations(ca_certs, ca_cert_dir)
+                    else:
+                        context.load_default_certs()
+                    self._tls_contexts[key] = context
+        return context
+
+    def _count(self, name, metric=None, **labels):
+        with self._lock:
+            self._stats[name] += 1
+        if self.metrics is not None and metric:
+            self.metrics.inc(metric, **labels)
+
+    def _observe(self, stage, seconds, host, port, scheme):
+        if self.metrics is not None:
+            netloc = host if DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+            self.metrics.observe(stage, seconds, netloc.lower())
+
+    def _build_connection_classes(self):
+        """创建绑定到当前管理器的连接和连接池类"""
+        manager = self
+
+        class ManagedHTTPConnection(HTTPConnection):
+            scheme_name = 'http'
+
+            def _new_conn(self):
+                # 使用缓存的DNS结果，依次尝试每个地址
+                start = time.perf_counter()
+                if manager.dns_cache is None:
+                    sock = super()._new_conn()
+                else:
+                    sock = self._connect_cached()
+                manager._observe('connect', time.perf_counter() - start, self.host, self.port, self.scheme_name)
+                return sock
+
+            def _connect_cached(self):
+                host = self._dns_host
+                try:
+                    addresses = manager.dns_cache.resolve(host, self.port)
+                except socket.gaierror:
+                    # 交给urllib3报告解析失败
+                    return super()._new_conn()
+                last_error = None
+                for _, sockaddr in addresses:
+                    self._dns_host = sockaddr[0]
+                    try:
+                        return super()._new_conn()
+                    except NewConnectionError as e:
+                        last_error = e
+                    finally:
+                        self._dns_host = host
+                manager.dns_cache.invalidate(host, self.port)
+                raise last_error
+
+        class ManagedHTTPSConnection(ManagedHTTPConnection, HTTPSConnection):
+            scheme_name = 'https'
+
+            def connect(self):
+                context = self.ssl_context
+                if context is not manager.tls_context:
+                    self._timed_connect()
+                    return
+                ca_certs, ca_cert_dir = self.ca_certs, self.ca_cert_dir
+                if resolve_cert_reqs(self.cert_reqs) == ssl.CERT_NONE:
+                    # 不校验证书（verify=False）时使用urllib3默认创建的SSLContext
+                    self.ssl_context = None
+                else:
+                    # 使用已加载这组CA证书的SSLContext，不再逐个连接重复加载
+                    self.ssl_context = manager.get_tls_context(ca_certs, ca_cert_dir)
+                    self.ca_certs = self.ca_cert_dir = None
+                try:
+                    self._timed_connect()
+                finally:
+                    self.ssl_context = context
+                    self.ca_certs, self.ca_cert_dir = ca_certs, ca_cert_dir
+
+            def _timed_connect(self):
+                start = time.perf_counter()
+                self._tcp_time = 0.0
+                super().connect()
+                # connect的总耗时减去TCP连接耗时即为TLS握手耗时
+                manager._observe('tls', time.perf_counter() - start - self._tcp_time,
+                                 self.host, self.port, self.scheme_name)
+                resumed = bool(getattr(self.sock, 'session_reused', False))
+                manager._count('tls_resumed' if resumed else 'tls_handshakes', 'crawler_tls_handshakes_total',
+                               resumed=str(resumed).lower())
+
+            def _new_conn(self):
+                start = time.perf_counter()
+                sock = super()._new_conn()
+                self._tcp_time = time.perf_counter() - start
+                return sock
+
+            def getresponse(self, *args, **kwargs):
+                # 服务器要求关闭连接时getresponse会清空self.sock，先保留引用
+                sock = self.sock
+                response = super().getresponse(*args, **kwargs)
+                context = getattr(sock, 'context', None)
+                if isinstance(context, TLSSessionContext):
+                    context.save_session(self.server_hostname or self.host, self.port, sock)
+                return response
+
+        class ManagedPoolMixin:
+            def _get_conn(self, timeout=None):
+                conn = super()._get_conn(timeout)
+                # 取出的连接已建立socket说明是复用的空闲连接
+                reused = getattr(conn, 'sock', None) is not None
+                manager._count('pool_hits' if reused else 'pool_misses', 'crawler_pool_requests_total',
+                               result='hit' if reused else 'miss')
+                return conn
+
+        class ManagedHTTPConnectionPool(ManagedPoolMixin, HTTPConnectionPool):
+            ConnectionCls = ManagedHTTPConnection
+
+        class ManagedHTTPSConnectionPool(ManagedPoolMixin, HTTPSConnectionPool):
+            ConnectionCls = ManagedHTTPSConnection
+
+        return {'http': ManagedHTTPConnectionPool, 'https': ManagedHTTPSConnectionPool}
+
+    def create_adapter(self):
+        """创建使用受管连接的HTTPAdapter"""
+        manager = self
+
+        class ManagedAdapter(HTTPAdapter):
+            def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+                pool_kwargs.setdefault('ssl_context', manager.tls_context)
+                super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+                self.poolmanager.pool_classes_by_scheme = dict(manager._connection_classes)
+
+        # pool_block=True：同一主机的连接数达到上限时等待，而不是临时新建再丢弃
+        return ManagedAdapter(pool_connections=self.max_host_pools, pool_maxsize=self.max_per_host,
+                              pool_block=True)
+
+    def mount(self, session):
+        """为会话的http和https挂载受管连接"""
+        adapter = self.create_adapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return adapter
+
+    def stats(self):
+        """连接统计：连接池命中/未命中、DNS缓存命中/未命中、TLS完整握手/会话恢复次数"""
+        with self._lock:
+            stats = dict(self._stats)
+        if self.dns_cache is not None:
+            stats['dns_hits'] = self.dns_cache.hits
+            stats['dns_misses'] = self.dns_cache.misses
+        total = stats['pool_hits'] + stats['pool_misses']
+        stats['pool_hit_rate'] = stats['pool_hits'] / total if total else 0.0
+        return stats
@@ -1,18 +1,323 @@
 import json
 import csv
-import pandas as pd
 from datetime import datetime
 import os
+import time
+from collections.abc import Mapping
+from utils.records import json_default, to_json_line
+from utils.logger import crawler_logger
+
+
+def flatten_value(value, list_separator=' | '):
+    """将字段值转换为表格单元格的值（CSV和Excel使用相同的规则）
+
+    None为空单元格；元素都是简单值的列表用list_separator连接；字典和包含字典、列表的列表转换为JSON文本
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        if all(item is None or isinstance(item, (str, int, float, bool)) for item in value):
+            return list_separator.join('' if item is None else str(item) for item in value)
+        return json.dumps(value, ensure_ascii=False, default=json_default)
+    if isinstance(value, Mapping):
+        return json.dumps(dict(value), ensure_ascii=False, default=json_default)
+    return str(value)
+
+
+def collect_columns(records):
+    """按出现顺序收集所有字典记录的字段名（所有记录的并集），没有字典记录时返回空列表"""
+    columns = {}
+    for record in records:
+        if isinstance(record, Mapping):
+            columns.update(dict.fromkeys(record))
+    return list(columns)
+
+
+def _iter_rows(data):
+    """将保存的数据统一为逐条记录的迭代器：列表和生成器逐条返回，单条记录或单个值作为一条"""
+    if isinstance(data, (str, bytes, Mapping)) or not hasattr(data, '__iter__'):
+        return iter([data])
+    return iter(data)
+
+
+class JsonlSink:
+    """增量写入的JSON Lines结果文件
+
+    每条记录写为一行，攒够batch_size条后批量写入磁盘；
+    单个文件超过max_bytes时切换到新文件（name.jsonl, name_001.jsonl, ...）；
+    传入metrics时每次批量写入记录write阶段耗时
+    """
+    
+    def __init__(self, filepath, batch_size=100, max_bytes=100 * 1024 * 1024, metrics=None):
+        self.base_path, self.ext = os.path.splitext(filepath)
+        self.ext = self.ext or '.jsonl'
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        self.filepaths = []
+        self.count = 0
+        self._buffer = []
+        self._file = None
+        self._file_bytes = 0
+        self._open_next_file()
+    
+    def _open_next_file(self):
+        """打开下一个输出文件"""
+        if self._file is not None:
+            self._file.close()
+        index = len(self.filepaths)
+        filepath = f"{self.base_path}{self.ext}" if index == 0 else f"{self.base_path}_{index:03d}{self.ext}"
+        self._file = open(filepath, 'w', encoding='utf-8')
+        self._file_bytes = 0
+        self.filepaths.append(filepath)
+    
+    def write(self, record):
+        """追加一条记录"""
+        self._buffer.append(to_json_line(record))
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        """将缓冲区中的记录写入磁盘"""
+        if not self._buffer:
+            return
+        start = time.perf_counter()
+        count = len(self._buffer)
+        chunk = '\n'.join(self._buffer) + '\n'
+        self._buffer = []
+        self._file.write(chunk)
+        self._file.flush()
+        if self.metrics is not None:
+            self.metrics.observe('write', time.perf_counter() - start)
+            self.metrics.inc('crawler_records_written_total', count, format='jsonl')
+        self._file_bytes += len(chunk.encode('utf-8'))
+        if self.max_bytes and self._file_bytes >= self.max_bytes:
+            self._open_next_file()
+    
+    def close(self):
+        """写入剩余记录并关闭文件"""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        # 切换后未写入任何内容的空文件不保留
+        if self._file_bytes == 0 and len(self.filepaths) > 1:
+            os.remove(self.filepaths.pop())
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _TableSink:
+    """增量写入的表格文件（CSV、Excel）的公共部分
+
+    记录可以是字典（或PageRecord）、列表/元组（一行）或单个值；字段值按flatten_value转换为单元格。
+    攒够batch_size条后批量写入，内存中最多保留一批记录。未指定columns时以第一批字典记录中出现的所有字段作为列，
+    之后的记录中新出现的字段不会写入，关闭时记录警告日志
+    """
+    
+    format_name = None
+    
+    def __init__(self, filepath, columns=None, batch_size=1000, list_separator=' | ', metrics=None):
+        self.filepath = filepath
+        self.columns = list(columns) if columns else None
+        self.batch_size = batch_size
+        self.list_separator = list_separator
+        self.metrics = metrics
+        self.count = 0
+        self.skipped_fields = set()
+        self._buffer = []
+        self._started = False
+        self._column_set = set()
+    
+    def write(self, record):
+        """追加一条记录"""
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        """将缓冲区中的记录写入文件"""
+        if not self._buffer:
+            return
+        start = time.perf_counter()
+        if not self._started:
+            self._start()
+        count = len(self._buffer)
+        rows = [self._row(record) for record in self._buffer]
+        self._buffer = []
+        self._write_rows(rows)
+        if self.metrics is not None:
+            self.metrics.observe('write', time.perf_counter() - start)
+            self.metrics.inc('crawler_records_written_total', count, format=self.format_name)
+    
+    def _start(self):
+        """确定列并写入表头（未指定列时从第一批字典记录中收集）"""
+        self._started = True
+        if self.columns is None:
+            self.columns = collect_columns(self._buffer)
+        self._column_set = set(self.columns)
+        self._open([str(column) for column in self.columns] if self.columns else None)
+    
+    def _row(self, record):
+        if isinstance(record, Mapping):
+            for key in record:
+                if key not in self._column_set:
+                    self.skipped_fields.add(key)
+            return [flatten_value(record.get(column), self.list_separator) for column in self.columns]
+        if isinstance(record, (list, tuple)):
+            return [flatten_value(value, self.list_separator) for value in record]
+        return [flatten_value(record, self.list_separator)]
+    
+    def _open(self, header):
+        raise NotImplementedError
+    
+    def _write_rows(self, rows):
+        raise NotImplementedError
+    
+    def _finish(self):
+        raise NotImplementedError
+    
+    def close(self):
+        """写入剩余记录并关闭文件"""
+        if self._buffer or not self._started:
+            if self._buffer:
+                self.flush()
+            else:
+                self._start()
+        self._finish()
+        if self.skipped_fields:
+            crawler_logger.warning(
+                f"以下字段在第一批记录中没有出现，未写入 {self.filepath}: {', '.join(map(str, self.skipped_fields))}"
+            )
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CsvSink(_TableSink):
+    """增量写入的CSV结果文件（utf-8-sig编码，Excel可直接打开）"""
+    
+    format_name = 'csv'
+    
+    def __init__(self, filepath, columns=None, batch_size=1000, list_separator=' | ', metrics=None):
+        super().__init__(filepath, columns, batch_size, list_separator, metrics)
+        # 使用utf-8-sig避免中文乱码
+        self._file = open(filepath, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.writer(self._file)
+    
+    def _open(self, header):
+        if header:
+            self._writer.writerow(header)
+    
+    def _write_rows(self, rows):
+        self._writer.writerows(rows)
+    
+    def _finish(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class ExcelSink(_TableSink):
+    """增量写入的Excel结果文件
+
+    使用openpyxl的只写模式，写入的行直接保存到临时文件，内存占用不随行数增长；
+    超过单个工作表的行数上限时新建工作表（Sheet2, Sheet3, ...）并重复表头
+    """
+    
+    format_name = 'excel'
+    # Excel单个工作表的最大行数和单元格的最大字符数
+    MAX_ROWS = 1048576
+    MAX_CELL_CHARS = 32767
+    
+    def __init__(self, filepath, columns=None, batch_size=1000, list_separator=' | ', metrics=None):
+        super().__init__(filepath, columns, batch_size, list_separator, metrics)
+        # openpyxl导入较慢，只在保存Excel时导入
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        
+        self._illegal_characters = ILLEGAL_CHARACTERS_RE
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_rows = 0
+        self._header = None
+        self._finished = False
+        self.truncated_cells = 0
+    
+    def _open(self, header):
+        # 之后新建的工作表都重复表头
+        self._header = [self._cell(value) for value in header] if header else None
+        self._new_sheet()
+    
+    def _new_sheet(self):
+        self._sheet = self._workbook.create_sheet(f"Sheet{len(self._workbook.worksheets) + 1}")
+        self._sheet_rows = 0
+        if self._header:
+            self._sheet.append(self._header)
+            self._sheet_rows = 1
+    
+    def _cell(self, value):
+        if isinstance(value, str):
+            # 去掉Excel不允许的控制字符，超长的文本截断
+            value = self._illegal_characters.sub('', value)
+            if len(value) > self.MAX_CELL_CHARS:
+                self.truncated_cells += 1
+                value = value[:self.MAX_CELL_CHARS]
+        return value
+    
+    def _write_rows(self, rows):
+        for row in rows:
+            row = [self._cell(value) for value in row]
+            if self._sheet_rows >= self.MAX_ROWS:
+                self._new_sheet()
+            self._sheet.append(row)
+            self._sheet_rows += 1
+    
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        start = time.perf_counter()
+        self._workbook.save(self.filepath)
+        if self.metrics is not None:
+            self.metrics.observe('write', time.perf_counter() - start)
+        if self.truncated_cells:
+            crawler_logger.warning(f"{self.filepath} 中有 {self.truncated_cells} 个单元格超过 {self.MAX_CELL_CHARS} 个字符，已截断")
+
 
 class DataStorage:
-    """数据存储类，支持多种数据格式存储"""
+    """数据存储类，支持多种数据格式存储
     
-    def __init__(self, data_dir='data'):
+    传入metrics（CrawlerMetrics）时记录每次保存的write阶段耗时和写入的记录数；
+    CSV和Excel逐批写入，内存占用与记录总数无关
+    """
+    
+    def __init__(self, data_dir='data', metrics=None, list_separator=' | '):
         self.data_dir = data_dir
+        self.metrics = metrics
+        # 保存CSV和Excel时列表字段的连接符
+        self.list_separator = list_separator
         # 创建数据目录（如果不存在）
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
     
+    def _record_write(self, format_type, start, data):
+        """记录一次保存的耗时和记录数"""
+        if self.metrics is None:
+            return
+        self.metrics.observe('write', time.perf_counter() - start)
+        count = len(data) if isinstance(data, (list, tuple)) else 1
+        self.metrics.inc('crawler_records_written_total', count, format=format_type)
+    
     def save_to_json(self, data, filename=None):
         """保存数据到JSON文件"""
         if filename is None:
@@ -20,54 +325,67 @@ class DataStorage:
         
         filepath = os.path.join(self.data_dir, filename)
         
+        start = time.perf_counter()
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            json.dump(data, f, ensure_ascii=False, indent=2, default=json_default)
+        self._record_write('json', start, data)
         
         print(f"数据已保存到 {filepath}")
         return filepath
     
-    def save_to_csv(self, data, filename=None, headers=None):
-        """保存数据到CSV文件"""
+    def open_jsonl_sink(self, filename=None, batch_size=100, max_bytes=100 * 1024 * 1024):
+        """打开一个增量写入的JSON Lines文件，用于边爬取边保存"""
         if filename is None:
-            filename = f"scraped_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            filename = f"scraped_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
         
-        filepath = os.path.join(self.data_dir, filename)
+        return JsonlSink(os.path.join(self.data_dir, filename), batch_size, max_bytes, self.metrics)
+    
+    def save_to_jsonl(self, records, filename=None, batch_size=100, max_bytes=100 * 1024 * 1024):
+        """逐条保存数据到JSON Lines文件，records可以是列表或生成器，返回写入的文件路径列表"""
+        with self.open_jsonl_sink(filename, batch_size, max_bytes) as sink:
+            for record in records:
+                sink.write(record)
         
-        # 如果数据是字典列表，使用pandas保存
-        if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-            df = pd.DataFrame(data)
-            df.to_csv(filepath, index=False, encoding='utf-8-sig')  # 使用utf-8-sig避免中文乱码
-        else:
-            # 如果是其他格式，直接写入CSV
-            with open(filepath, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f)
-                if headers:
-                    writer.writerow(headers)
-                if isinstance(data, list):
-                    for row in data:
-                        if isinstance(row, list) or isinstance(row, tuple):
-                            writer.writerow(row)
-                        else:
-                            writer.writerow([row])
-                else:
-                    writer.writerow([data])
+        print(f"数据已保存到 {', '.join(sink.filepaths)}（共 {sink.count} 条）")
+        return sink.filepaths
+    
+    def open_csv_sink(self, filename=None, columns=None, batch_size=1000):
+        """打开一个增量写入的CSV文件，用于边爬取边保存"""
+        if filename is None:
+            filename = f"scraped_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
-        print(f"数据已保存到 {filepath}")
-        return filepath
+        return CsvSink(os.path.join(self.data_dir, filename), columns, batch_size, self.list_separator, self.metrics)
     
-    def save_to_excel(self, data, filename=None):
-        """保存数据到Excel文件"""
+    def open_excel_sink(self, filename=None, columns=None, batch_size=1000):
+        """打开一个增量写入的Excel文件，用于边爬取边保存"""
         if filename is None:
             filename = f"scraped_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
-        filepath = os.path.join(self.data_dir, filename)
+        return ExcelSink(os.path.join(self.data_dir, filename), columns, batch_size, self.list_separator, self.metrics)
+    
+    def save_to_csv(self, data, filename=None, headers=None, batch_size=1000):
+        """保存数据到CSV文件，data可以是列表或生成器，逐批写入
         
-        if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-            df = pd.DataFrame(data)
-        else:
-            df = pd.DataFrame(data)
+        headers为表头（字典记录时同时指定列及其顺序）；不指定时，列表中的字典记录以所有记录的字段并集作为表头，
+        生成器以第一批记录中出现的字段作为表头
+        """
+        if headers is None and isinstance(data, (list, tuple)):
+            headers = collect_columns(data) or None
+        with self.open_csv_sink(filename, headers, batch_size) as sink:
+            for record in _iter_rows(data):
+                sink.write(record)
         
-        df.to_excel(filepath, index=False, engine='openpyxl')
+        print(f"数据已保存到 {sink.filepath}")
+        return sink.filepath
+    
+    def save_to_excel(self, data, filename=None, batch_size=1000):
+        """保存数据到Excel文件，data可以是列表或生成器，逐批写入，表头的规则与save_to_csv相同"""
+        columns = None
+        if isinstance(data, (list, tuple)):
+            columns = collect_columns(data) or None
+        with self.open_excel_sink(filename, columns, batch_size) as sink:
+            for record in _iter_rows(data):
+                sink.write(record)
         
-        print(f"数据已保存到 {filepath}")
-        return filepath
\ No newline at end of file
+        print(f"数据已保存到 {sink.filepath}")
+        return sink.filepath
@@ -0,0 +1,108 @@
+import re
+import soupsieve
+from bs4 import Tag
+from utils.records import PageRecord
+
+# 只包含标签名和可选的属性存在检查的简单选择器，如 "p"、"h1, h2"、"a[href]"
+_SIMPLE_SELECTOR = re.compile(r'^\s*([a-zA-Z][\w-]*)(?:\[\s*([\w-]+)\s*\])?\s*$')
+_COMBINATOR = re.compile(r'\s*[>+~]\s*|\s+')
+_TAG_NAME = re.compile(r'^[a-zA-Z][\w-]*')
+
+
+def _key_tag_names(selector):
+    """获取选择器最右侧复合选择器要求的标签名集合，如 "div.meta > span.author" -> {"span"}
+
+    无法确定时（通配、只有类名、包含属性、命名空间或函数）返回None
+    """
+    if any(char in selector for char in '[(|"\'\\'):
+        return None
+    names = set()
+    for part in selector.split(','):
+        last = _COMBINATOR.split(part.strip())[-1]
+        match = _TAG_NAME.match(last)
+        if not match:
+            return None
+        names.add(match.group(0).lower())
+    return names
+
+
+def _compile_matcher(selector):
+    """将CSS选择器编译为匹配函数
+
+    简单选择器直接比较标签名；其余交给soupsieve，并先用标签名过滤，
+    避免对每个节点都调用开销较大的soupsieve匹配
+    """
+    simple = []
+    for part in selector.split(','):
+        match = _SIMPLE_SELECTOR.match(part)
+        if not match:
+            compiled = soupsieve.compile(selector).match
+            key_names = _key_tag_names(selector)
+            if key_names is None:
+                return compiled
+            return lambda tag: tag.name in key_names and compiled(tag)
+        simple.append((match.group(1).lower(), match.group(2)))
+
+    names = {name for name, attr in simple if attr is None}
+    attr_names = [(name, attr) for name, attr in simple if attr is not None]
+
+    def match(tag):
+        if tag.name in names:
+            return True
+        for name, attr in attr_names:
+            if tag.name == name and tag.has_attr(attr):
+                return True
+        return False
+
+    return match
+
+
+class ExtractionPlan:
+    """编译后的字段提取计划
+
+    将选择器字典编译一次后反复使用，一次遍历文档树即可完成所有字段的匹配。
+    字段名的后缀决定取值方式（与parse_page一致）：
+    _html 取元素的HTML，_attrs 取元素属性，其余取去除空白的文本。
+    html_mode为'prettify'时输出格式化的HTML（与旧版本一致），为'raw'时直接输出原始HTML，速度更快。
+    compact为True时返回紧凑的PageRecord（用法与字典相同，占用内存更少），为False时返回普通字典
+    """
+
+    def __init__(self, selectors, html_mode='prettify', compact=False):
+        if html_mode not in ('prettify', 'raw'):
+            raise ValueError(f"不支持的HTML输出模式: {html_mode}")
+        self.selectors = dict(selectors)
+        self.html_mode = html_mode
+        self.compact = compact
+        self.fields = [(name, _compile_matcher(selector)) for name, selector in self.selectors.items()]
+        self.field_names = tuple(self.selectors)
+
+    def _value(self, field_name, element):
+        """按字段名后缀提取单个元素的值"""
+        if field_name.endswith('_html'):
+            return element.prettify() if self.html_mode == 'prettify' else str(element)
+        elif field_name.endswith('_attrs'):
+            return element.attrs
+        return element.get_text(strip=True)
+
+    def extract(self, soup):
+        """从解析后的文档中提取所有字段"""
+        matches = {name: [] for name, _ in self.fields}
+        for node in soup.descendants:
+            if not isinstance(node, Tag):
+                continue
+            for name, match in self.fields:
+                if match(node):
+                    matches[name].append(node)
+
+        values = []
+        for name, _ in self.fields:
+            elements = matches[name]
+            if not elements:
+                values.append(None)
+            elif len(elements) == 1:
+                values.append(self._value(name, elements[0]))
+            else:
+                values.append([self._value(name, element) for element in elements])
+        if self.compact:
+            return PageRecord.from_values(self.field_names, values)
+        return dict(zip(self.field_names, values))
@@ -0,0 +1,114 @@
+import hashlib
+import heapq
+import math
+from collections import deque
+
+
+class BloomFilter:
+    """布隆过滤器：以固定内存记录大量URL，存在很小的误判率（可能把新URL当作已访问）"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = int(capacity)
+        self.error_rate = error_rate
+        # 根据容量和误判率计算位数组大小和哈希函数个数
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        """使用双重哈希计算元素对应的位"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item):
+        """添加元素"""
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+
+def create_url_filter(capacity=None, error_rate=0.001):
+    """创建URL去重集合：capacity为None时使用精确的set，否则使用固定内存的布隆过滤器"""
+    if capacity is None:
+        return set()
+    return BloomFilter(capacity, error_rate)
+
+
+class URLFrontier:
+    """待爬取URL队列，支持广度优先和优先级两种模式
+
+    入队时去重并检查深度限制，队列达到max_size后丢弃新的URL，保证内存占用有上限。
+    journal为可选函数journal(entry)，每次入队（[url, depth, priority]）和出队（None）时调用，
+    用于追加写入断点；用replay按顺序重放这些记录即可恢复队列和去重集合
+    """
+
+    def __init__(self, max_depth=2, max_size=100000, seen=None, use_priority=False, journal=None):
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.seen = seen if seen is not None else set()
+        self.use_priority = use_priority
+        self.journal = journal
+        self.dropped = 0
+        self._queue = [] if use_priority else deque()
+        self._counter = 0
+
+    def push(self, url, depth=0, priority=0):
+        """URL入队，返回是否入队成功（priority越小越先爬取，仅优先级模式有效）"""
+        if depth > self.max_depth or url in self.seen:
+            return False
+        if self.max_size and len(self._queue) >= self.max_size:
+            self.dropped += 1
+            return False
+
+        self.seen.add(url)
+        if self.use_priority:
+            # 计数器保证优先级相同时按入队顺序出队
+            heapq.heappush(self._queue, (priority, self._counter, url, depth))
+            self._counter += 1
+        else:
+            self._queue.append((url, depth))
+        if self.journal:
+            self.journal([url, depth, priority])
+        return True
+
+    def pop(self):
+        """取出下一个待爬取的URL，返回(url, depth)"""
+        if self.use_priority:
+            _, _, url, depth = heapq.heappop(self._queue)
+        else:
+            url, depth = self._queue.popleft()
+        if self.journal:
+            self.journal(None)
+        return url, depth
+
+    def replay(self, entries):
+        """按顺序重放journal记录的入队和出队操作，返回重放过程中出队的URL列表"""
+        journal, self.journal = self.journal, None
+        popped = []
+        try:
+            for entry in entries:
+                if entry is None:
+                    popped.append(self.pop()[0])
+                else:
+                    self.push(*entry)
+        finally:
+            self.journal = journal
+        return popped
+
+    def __len__(self):
+        return len(self._queue)
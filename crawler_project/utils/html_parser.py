@@ -0,0 +1,30 @@
+from bs4 import BeautifulSoup
+
+
+def resolve_parser(parser):
+    """检查解析器是否可用，lxml未安装时退回到内置的html.parser"""
+    if parser in ('lxml', 'lxml-xml', 'xml'):
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            return 'html.parser'
+    return parser
+
+
+def get_soup(response, parser='html.parser'):
+    """获取响应对应的BeautifulSoup对象
+
+    解析结果缓存在response.soup上，parse_page、extract_links、extract_images
+    共用同一次解析，同一个响应只解析一次
+    """
+    soup = getattr(response, 'soup', None)
+    if soup is not None:
+        return soup
+
+    soup = BeautifulSoup(response.text, resolve_parser(parser))
+    try:
+        response.soup = soup
+    except AttributeError:
+        # 不允许设置属性的响应对象只能不缓存
+        pass
+    return soup
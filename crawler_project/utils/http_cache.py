@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import threading
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+
+class HTTPCache:
+    """基于磁盘的HTTP缓存，利用ETag/Last-Modified发送条件请求
+
+    服务器返回304时直接使用缓存的页面内容；缓存总大小超过max_bytes时，
+    按最近使用时间淘汰最旧的条目
+    """
+
+    def __init__(self, cache_dir='http_cache', max_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def _paths(self, url):
+        """获取URL对应的元数据文件和内容文件路径"""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        directory = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(directory, key + '.json'), os.path.join(directory, key + '.body')
+
+    def _load_meta(self, url):
+        """读取URL的缓存元数据，不存在时返回None"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url or not os.path.exists(body_path):
+            return None
+        return meta
+
+    def conditional_headers(self, url):
+        """返回条件请求头（If-None-Match / If-Modified-Since），没有缓存时返回空字典"""
+        meta = self._load_meta(url)
+        if not meta:
+            return {}
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def load(self, url, not_modified_response=None):
+        """服务器返回304时，用缓存的内容构造一个200响应，缓存不存在时返回None"""
+        meta = self._load_meta(url)
+        if not meta:
+            return None
+
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        # 更新修改时间，淘汰时按最近使用时间排序
+        os.utime(meta_path, None)
+
+        response = Response()
+        response.status_code = 200
+        response._content = body
+        # 重定向后的页面使用最终URL，页面中的相对链接才能正确解析
+        response.url = meta.get('final_url') or meta['url']
+        response.headers = CaseInsensitiveDict(meta.get('headers', {}))
+        response.encoding = meta.get('encoding')
+        response.from_cache = True
+        if not_modified_response is not None:
+            response.request = not_modified_response.request
+            response.elapsed = not_modified_response.elapsed
+        return response
+
+    def store(self, response, url=None):
+        """缓存带有ETag或Last-Modified的200响应
+
+        url为请求的URL（默认response.url）；发生重定向时response.url是重定向后的URL，
+        而下次请求时按请求的URL查找缓存，因此按请求的URL保存
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code != 200 or not (etag or last_modified):
+            return False
+
+        url = url or response.url
+        body = response.content
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+
+        meta = {
+            'url': url,
+            'final_url': response.url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding,
+            'headers': dict(response.headers),
+            'size': len(body),
+        }
+        old_size = self._entry_size(meta_path, body_path)
+
+        self._write_atomic(body_path, body)
+        self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += self._entry_size(meta_path, body_path) - old_size
+        self._evict_if_needed()
+        return True
+
+    @staticmethod
+    def _write_atomic(path, data):
+        """先写临时文件再替换，避免其他线程读到写了一半的缓存"""
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _entry_size(meta_path, body_path):
+        """缓存条目占用的字节数"""
+        size = 0
+        for path in (meta_path, body_path):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def _scan(self):
+        """扫描缓存目录，返回[(最近使用时间, 大小, 元数据路径, 内容路径)]"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                meta_path = os.path.join(root, name)
+                body_path = meta_path[:-len('.json')] + '.body'
+                try:
+                    mtime = os.path.getmtime(meta_path)
+                except OSError:
+                    continue
+                entries.append((mtime, self._entry_size(meta_path, body_path), meta_path, body_path))
+        return entries
+
+    def _evict_if_needed(self):
+        """缓存总大小超过上限时，淘汰最久未使用的条目直到低于上限的90%"""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry[1] for entry in self._scan())
+            if self._total_bytes <= self.max_bytes:
+                return
+
+            target = self.max_bytes * 0.9
+            for _, size, meta_path, body_path in sorted(self._scan()):
+                if self._total_bytes <= target:
+                    break
+                for path in (meta_path, body_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._total_bytes -= size
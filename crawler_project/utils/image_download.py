@@ -0,0 +1,57 @@
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+# 多个下载线程同时选择文件名时加锁，避免重名文件互相覆盖
+_filepath_lock = threading.Lock()
+
+
+def build_image_filename(img_url, content_type=''):
+    """根据图片URL生成文件名，URL中没有文件名时使用时间戳"""
+    filename = os.path.basename(urlparse(img_url).path)
+    if not filename or '.' not in filename:
+        ext = '.jpg'  # 默认扩展名
+        if 'png' in content_type.lower():
+            ext = '.png'
+        filename = f"image_{int(time.time())}_{random.randint(1000, 9999)}{ext}"
+    return filename
+
+
+def stream_to_temp_file(response, save_dir, chunk_size=64 * 1024, chunks=None):
+    """将响应体分块写入save_dir下的临时文件，同时计算SHA-256，返回(临时文件路径, 十六进制摘要)
+
+    chunks为数据块迭代器（如边下载边筛选的ImageFilter.stream），默认从response逐块读取；
+    写入过程中出现异常时删除临时文件
+    """
+    if chunks is None:
+        chunks = response.iter_content(chunk_size=chunk_size)
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=save_dir, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if chunk:
+                    f.write(chunk)
+                    digest.update(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path, digest.hexdigest()
+
+
+def move_into_place(temp_path, save_dir, filename):
+    """将下载完成的临时文件重命名为最终文件，文件已存在时添加数字后缀"""
+    filepath = os.path.join(save_dir, filename)
+    with _filepath_lock:
+        counter = 1
+        original_filepath = filepath
+        while os.path.exists(filepath):
+            name, ext = os.path.splitext(original_filepath)
+            filepath = f"{name}_{counter}{ext}"
+            counter += 1
+        os.replace(temp_path, filepath)
+    return filepath
@@ -0,0 +1,183 @@
+import itertools
+import re
+import struct
+
+# JPEG中带有图片宽高的SOF标记（不包括DHT=C4、JPG=C8、DAC=CC）
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+\d+-\d+/(\d+)', re.IGNORECASE)
+
+# 读取到这么多字节仍无法识别格式时，认为不是图片（WebP需要12字节才能识别）
+_MIN_HEADER_BYTES = 16
+
+
+def parse_image_header(data):
+    """从图片开头的字节识别实际格式和宽高
+
+    返回(格式, 宽, 高)，格式为png、jpeg、gif、webp、bmp之一；数据不足以得到宽高时宽高为None，
+    不是可识别的图片时返回None
+    """
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        if len(data) >= 24 and data[12:16] == b'IHDR':
+            width, height = struct.unpack('>II', data[16:24])
+            return 'png', width, height
+        return 'png', None, None
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        if len(data) >= 10:
+            width, height = struct.unpack('<HH', data[6:10])
+            return 'gif', width, height
+        return 'gif', None, None
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return ('webp',) + _webp_size(data)
+    if data[:2] == b'\xff\xd8':
+        return ('jpeg',) + _jpeg_size(data)
+    if data[:2] == b'BM':
+        if len(data) >= 26:
+            width, height = struct.unpack('<ii', data[18:26])
+            return 'bmp', width, abs(height)
+        return 'bmp', None, None
+    return None
+
+
+def _jpeg_size(data):
+    """依次跳过JPEG的各个段，直到找到SOF段"""
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None, None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # 填充字节
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # 没有长度字段的标记
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 9 <= len(data):
+                height, width = struct.unpack('>HH', data[i + 5:i + 9])
+                return width, height
+            return None, None
+        if marker == 0xDA:
+            # 已到图像数据，没有SOF段
+            return None, None
+        i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    return None, None
+
+
+def _webp_size(data):
+    chunk = data[12:16]
+    if chunk == b'VP8X' and len(data) >= 30:
+        width = 1 + int.from_bytes(data[24:27], 'little')
+        height = 1 + int.from_bytes(data[27:30], 'little')
+        return width, height
+    if chunk == b'VP8 ' and len(data) >= 30 and data[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25 and data[20] == 0x2F:
+        bits = int.from_bytes(data[21:25], 'little')
+        return 1 + (bits & 0x3FFF), 1 + ((bits >> 14) & 0x3FFF)
+    return None, None
+
+
+def content_range_total(value):
+    """从Content-Range（如bytes 0-1023/54321）中取出文件总大小，未知时返回None"""
+    match = _CONTENT_RANGE_RE.match((value or '').strip())
+    return int(match.group(1)) if match else None
+
+
+class ImageRejected(Exception):
+    """图片不符合筛选条件，reason为原因，info为已知的{'bytes', 'format', 'width', 'height'}"""
+
+    def __init__(self, reason, info):
+        super().__init__(reason)
+        self.reason = reason
+        self.info = info
+
+
+class ImageFilter:
+    """按文件大小、实际格式和宽高筛选图片，限制为0（或None）表示不限"""
+
+    def __init__(self, min_width=0, min_height=0, max_width=0, max_height=0, min_bytes=0, max_bytes=0,
+                 allowed_formats=None):
+        self.min_width = min_width
+        self.min_height = min_height
+        self.max_width = max_width
+        self.max_height = max_height
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.allowed_formats = tuple(allowed_formats) if allowed_formats else None
+
+    @property
+    def needs_header(self):
+        """是否需要读取图片头（按格式或宽高筛选）；只按文件大小筛选时HEAD请求即可"""
+        return bool(self.allowed_formats or self.min_width or self.min_height
+                    or self.max_width or self.max_height)
+
+    def check(self, size=None, image_format=None, width=None, height=None):
+        """返回不符合条件的原因，符合条件时返回None；未知的值（None）不参与判断"""
+        if size is not None:
+            if self.min_bytes and size < self.min_bytes:
+                return 'too_small_bytes'
+            if self.max_bytes and size > self.max_bytes:
+                return 'too_large_bytes'
+        if image_format is not None and self.allowed_formats and image_format not in self.allowed_formats:
+            return 'format'
+        if width is not None and height is not None:
+            if (self.min_width and width < self.min_width) or (self.min_height and height < self.min_height):
+                return 'too_small_dimensions'
+            if (self.max_width and width > self.max_width) or (self.max_height and height > self.max_height):
+                return 'too_large_dimensions'
+        return None
+
+    def stream(self, chunks, size=None, probe_bytes=32 * 1024):
+        """边下载边筛选图片，返回(info, 数据块迭代器)
+
+        chunks为响应体的数据块迭代器，size为Content-Length（未知时为None）。先按size检查；
+        需要按格式或宽高筛选时读取开头的数据（最多约probe_bytes字节）解析文件头。不符合条件时抛出ImageRejected，
+        调用方关闭响应即可，不再下载剩余内容。返回的迭代器从头生成全部数据（包括已读取的开头部分）；
+        size未知时读取超过max_bytes或读完后不足min_bytes同样抛出ImageRejected
+        """
+        info = {'bytes': size, 'format': None, 'width': None, 'height': None}
+        reason = self.check(size=size)
+        if reason:
+            raise ImageRejected(reason, info)
+
+        chunks = iter(chunks)
+        head = b''
+        if self.needs_header:
+            header = None
+            for chunk in chunks:
+                head += chunk
+                header = parse_image_header(head)
+                if header is None and len(head) < _MIN_HEADER_BYTES:
+                    continue
+                # 已识别宽高、确定不是图片或已读取足够多的数据
+                if header is None or header[1] is not None or len(head) >= probe_bytes:
+                    break
+            if header is None:
+                info['format'] = ''
+                raise ImageRejected('not_image', info)
+            info['format'], info['width'], info['height'] = header
+            reason = self.check(None, *header)
+            if reason:
+                raise ImageRejected(reason, info)
+        return info, self._iter_checked(head, chunks, info)
+
+    def _iter_checked(self, head, chunks, info):
+        """生成全部数据；大小未知时边读取边检查文件大小"""
+        check_size = info['bytes'] is None and (self.min_bytes or self.max_bytes)
+        received = 0
+        if head:
+            chunks = itertools.chain((head,), chunks)
+        for chunk in chunks:
+            received += len(chunk)
+            if check_size and self.max_bytes and received > self.max_bytes:
+                info['bytes'] = received
+                raise ImageRejected('too_large_bytes', info)
+            yield chunk
+        if check_size and self.min_bytes and received < self.min_bytes:
+            info['bytes'] = received
+            raise ImageRejected('too_small_bytes', info)
+        info['bytes'] = received
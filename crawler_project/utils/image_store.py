@@ -0,0 +1,89 @@
+import os
+import shutil
+import sqlite3
+import threading
+
+
+class ImageStore:
+    """内容寻址的图片仓库
+
+    图片按内容的SHA-256保存在store_dir/objects下，相同内容只保存一份；
+    索引记录 URL -> 内容哈希 和 内容哈希 -> 文件路径，下载过的URL可以直接跳过。
+    保存目录中的文件名是指向仓库文件的硬链接，不额外占用磁盘空间
+    """
+
+    def __init__(self, store_dir='image_store'):
+        self.store_dir = store_dir
+        self.objects_dir = os.path.join(store_dir, 'objects')
+        self.tmp_dir = os.path.join(store_dir, 'tmp')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(store_dir, 'index.db'), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS objects (hash TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL, filename TEXT)'
+            )
+
+    def lookup_url(self, url):
+        """查找已下载过的URL，返回(仓库文件路径, 文件名)，未下载过或文件已丢失时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT objects.path, urls.filename FROM urls JOIN objects ON urls.hash = objects.hash '
+                'WHERE urls.url = ?', (url,)
+            ).fetchone()
+        if row and os.path.exists(row[0]):
+            return row
+        return None
+
+    def add(self, temp_path, content_hash, url, filename):
+        """将下载完成的临时文件存入仓库，内容已存在时删除临时文件，返回仓库文件路径"""
+        ext = os.path.splitext(filename)[1].lower()
+        with self._lock:
+            row = self._conn.execute('SELECT path FROM objects WHERE hash = ?', (content_hash,)).fetchone()
+            if row and os.path.exists(row[0]):
+                object_path = row[0]
+                os.remove(temp_path)
+            else:
+                object_dir = os.path.join(self.objects_dir, content_hash[:2])
+                os.makedirs(object_dir, exist_ok=True)
+                object_path = os.path.join(object_dir, content_hash + ext)
+                os.replace(temp_path, object_path)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO objects (hash, path, size) VALUES (?, ?, ?)',
+                    (content_hash, object_path, os.path.getsize(object_path))
+                )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO urls (url, hash, filename) VALUES (?, ?, ?)',
+                (url, content_hash, filename)
+            )
+            self._conn.commit()
+        return object_path
+
+    def link(self, object_path, save_dir, filename):
+        """在保存目录中创建指向仓库文件的硬链接，已有相同内容的同名文件时直接复用"""
+        os.makedirs(save_dir, exist_ok=True)
+        filepath = os.path.join(save_dir, filename)
+        name, ext = os.path.splitext(filepath)
+        counter = 1
+        with self._lock:
+            while os.path.exists(filepath):
+                if os.path.samefile(filepath, object_path):
+                    return filepath
+                filepath = f"{name}_{counter}{ext}"
+                counter += 1
+            try:
+                os.link(object_path, filepath)
+            except OSError:
+                # 跨文件系统或不支持硬链接时退回到复制
+                shutil.copy2(object_path, filepath)
+        return filepath
+
+    def close(self):
+        """关闭索引数据库"""
+        with self._lock:
+            self._conn.close()
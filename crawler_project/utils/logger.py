@@ -1,30 +1,168 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import threading
 from datetime import datetime
 
+# 日志队列长度上限，写日志跟不上时INFO及以下的日志会被丢弃，WARNING及以上的日志会等待
+QUEUE_SIZE = 10000
+
+# 记录器名称 -> 对应的_LogManager
+_managers = {}
+
+
+class _LazyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """按大小轮转的日志文件，第一次写入时才创建目录和文件"""
+
+    def _open(self):
+        directory = os.path.dirname(self.baseFilename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return super()._open()
+
+
+class _AsyncQueueHandler(logging.handlers.QueueHandler):
+    """将日志放入队列，由后台监听线程写入文件和控制台，记录日志的线程不等待磁盘和终端IO
+
+    监听线程在第一次记录日志时才启动（fork出的子进程中会重新启动）
+    """
+
+    def __init__(self, manager):
+        super().__init__(queue.Queue(QUEUE_SIZE))
+        self.manager = manager
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self.manager.ensure_started()
+        super().emit(record)
+
+
+class _SamplingFilter(logging.Filter):
+    """按比例抽样INFO及以下的日志，WARNING及以上的日志全部保留"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+class _LogManager:
+    """管理日志队列的监听线程和输出目标"""
+
+    def __init__(self, log_file):
+        self.log_file = log_file
+        self.log_dir = 'logs'
+        self.max_bytes = 10 * 1024 * 1024
+        self.backup_count = 5
+        self.handler = _AsyncQueueHandler(self)
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _build_handlers(self):
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+        log_filename = os.path.join(self.log_dir, f"{self.log_file}_{datetime.now().strftime('%Y%m%d')}.log")
+        file_handler = _LazyRotatingFileHandler(
+            log_filename, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding='utf-8', delay=True
+        )
+        file_handler.setFormatter(formatter)
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        return file_handler, console_handler
+
+    def ensure_started(self):
+        """启动监听线程（已在当前进程中启动时直接返回）"""
+        if self._listener is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                # fork出的子进程继承了父进程的队列但没有监听线程，换一个新队列
+                self.handler.queue = queue.Queue(QUEUE_SIZE)
+            self._listener = logging.handlers.QueueListener(
+                self.handler.queue, *self._build_handlers(), respect_handler_level=True
+            )
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """写完队列中剩余的日志并停止监听线程"""
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                if self.handler.dropped:
+                    self.handler.queue.put(logging.makeLogRecord({
+                        'levelno': logging.WARNING, 'levelname': 'WARNING',
+                        'msg': f"日志队列已满，丢弃了 {self.handler.dropped} 条INFO日志"
+                    }))
+                    self.handler.dropped = 0
+                self._listener.stop()
+                for handler in self._listener.handlers:
+                    handler.close()
+            self._listener = None
+
+    def configure(self, log_dir, max_bytes, backup_count):
+        """修改输出目标，监听线程已启动时用新的设置重新启动"""
+        settings = (log_dir, max_bytes, backup_count)
+        if settings == (self.log_dir, self.max_bytes, self.backup_count):
+            return
+        running = self._listener is not None and self._pid == os.getpid()
+        self.stop()
+        self.log_dir, self.max_bytes, self.backup_count = settings
+        if running:
+            self.ensure_started()
+
+
 def setup_logger(name, log_file, level=logging.INFO):
-    """设置日志记录器"""
-    # 创建logs目录（如果不存在）
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
-    # 创建格式化的日志文件名
-    log_filename = os.path.join('logs', f"{log_file}_{datetime.now().strftime('%Y%m%d')}.log")
-    
-    # 创建logger
-    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-    handler = logging.FileHandler(log_filename, encoding='utf-8')
-    handler.setFormatter(formatter)
-    
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    
+    """设置日志记录器
+
+    日志通过队列交给后台线程写入，文件按大小轮转；创建时不打开文件，第一次记录日志时才创建
+    logs目录和日志文件。输出目录、轮转大小和抽样比例由configure_logger设置
+    """
+    manager = _LogManager(log_file)
+
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    logger.addHandler(handler)
-    logger.addHandler(console_handler)
-    
+    logger.addHandler(manager.handler)
+    _managers[name] = manager
+    atexit.register(manager.stop)
+
+    # 每个页面、每张图片一条的INFO日志写入子记录器，可以单独抽样
+    url_logger = logging.getLogger(f"{name}.url")
+    url_logger.addFilter(_SamplingFilter())
+
     return logger
 
+
+def configure_logger(logger, level='INFO', log_dir='logs', max_bytes=10 * 1024 * 1024, backup_count=5,
+                     url_log_sample_rate=1.0):
+    """按配置调整日志记录器
+
+    level为日志级别，max_bytes和backup_count为日志文件的轮转大小和保留的备份数量，
+    url_log_sample_rate为逐URL的INFO日志的抽样比例（1表示全部记录，0.1表示记录约10%）
+    """
+    logger.setLevel(level)
+    _managers[logger.name].configure(log_dir, max_bytes, backup_count)
+    for log_filter in logging.getLogger(f"{logger.name}.url").filters:
+        if isinstance(log_filter, _SamplingFilter):
+            log_filter.rate = url_log_sample_rate
+
+
 # 创建爬虫日志记录器
-crawler_logger = setup_logger('crawler', 'crawler')
\ No newline at end of file
+crawler_logger = setup_logger('crawler', 'crawler')
+# 逐URL的INFO日志（成功获取页面、图片下载成功等）
+url_logger = logging.getLogger('crawler.url')
@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 耗时直方图的桶上限（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    """转义Prometheus标签值中的反斜杠、双引号和换行"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+class Histogram:
+    """累计分桶的耗时直方图"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class CrawlerMetrics:
+    """爬虫运行指标
+
+    按(阶段, 主机)汇总各阶段耗时的直方图，并按标签累计字节数、状态码、重试次数等计数器；
+    可以导出为Prometheus文本格式，写入文件或通过本地HTTP端点提供给Prometheus抓取
+    """
+
+    # 直方图和计数器的说明，出现在导出文本的HELP行中
+    HELP = {
+        'crawler_stage_seconds': '各阶段耗时（秒）：queue_wait 排队等待，connect 建立TCP连接，tls TLS握手，ttfb 首字节，'
+                                 'body 下载响应体，render 浏览器渲染，parse 解析HTML，extract 提取字段，write 写入文件',
+        'crawler_bytes_total': '下载的字节数',
+        'crawler_responses_total': '按状态码统计的响应数',
+        'crawler_retries_total': '重试次数',
+        'crawler_errors_total': '请求异常次数',
+        'crawler_records_written_total': '写入文件的记录数',
+        'crawler_images_skipped_total': '因不符合图片过滤条件而跳过的图片数（reason 跳过原因）',
+        'crawler_pool_requests_total': '从连接池取连接的次数（hit 复用空闲连接，miss 新建连接）',
+        'crawler_tls_handshakes_total': 'TLS握手次数（resumed 是否恢复了之前的会话）',
+    }
+
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def observe(self, stage, seconds, host=''):
+        """记录一个阶段的耗时"""
+        if not self.enabled:
+            return
+        key = (stage, host)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage, host=''):
+        """统计with代码块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, host)
+
+    def inc(self, name, value=1, **labels):
+        """累加计数器，labels为计数器的标签"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counter_value(self, name, **labels):
+        """计数器的当前值，labels只指定部分标签时返回所有匹配项之和"""
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(value for (counter_name, counter_labels), value in self._counters.items()
+                       if counter_name == name and wanted <= set(counter_labels))
+
+    def stage_summary(self):
+        """按阶段汇总的耗时，返回 {阶段: {'count': 次数, 'total': 总耗时, 'avg': 平均耗时}}"""
+        summary = {}
+        with self._lock:
+            for (stage, _), histogram in self._histograms.items():
+                item = summary.setdefault(stage, {'count': 0, 'total': 0.0})
+                item['count'] += histogram.count
+                item['total'] += histogram.sum
+        for item in summary.values():
+            item['avg'] = item['total'] / item['count'] if item['count'] else 0.0
+        return summary
+
+    def to_prometheus(self):
+        """导出为Prometheus文本格式"""
+        lines = []
+        with self._lock:
+            if self._histograms:
+                lines.append(f"# HELP crawler_stage_seconds {self.HELP['crawler_stage_seconds']}")
+                lines.append('# TYPE crawler_stage_seconds histogram')
+                for (stage, host), histogram in sorted(self._histograms.items()):
+                    labels = [('stage', stage), ('host', host)]
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"crawler_stage_seconds_bucket"
+                                     f"{_format_labels(labels + [('le', _format_value(float(bound)))])} {cumulative}")
+                    lines.append(f"crawler_stage_seconds_bucket{_format_labels(labels + [('le', '+Inf')])} "
+                                 f"{histogram.count}")
+                    lines.append(f"crawler_stage_seconds_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"crawler_stage_seconds_count{_format_labels(labels)} {histogram.count}")
+
+            names = sorted({name for name, _ in self._counters})
+            for name in names:
+                lines.append(f"# HELP {name} {self.HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for (counter_name, labels), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """将指标写入文件（先写临时文件再替换，读取方不会读到写了一半的内容）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+        return path
+
+    def start_http_server(self, port, host='127.0.0.1'):
+        """在后台线程中启动指标HTTP端点（GET /metrics），返回实际监听的端口"""
+        if self._server is not None:
+            return self._server.server_address[1]
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 抓取请求很频繁，不输出访问日志
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def stop_http_server(self):
+        """关闭指标HTTP端点"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
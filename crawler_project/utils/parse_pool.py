@@ -0,0 +1,31 @@
+import multiprocessing
+from bs4 import BeautifulSoup
+from utils.extraction import ExtractionPlan
+from utils.html_parser import resolve_parser
+
+# 每个解析进程内缓存编译好的提取计划，同一组选择器只编译一次
+_plans = {}
+
+
+def parse_html(html, selectors, parser='html.parser', html_mode='prettify', compact=False):
+    """在解析进程中解析HTML并提取字段，结果与WebCrawler.parse_page相同
+
+    该函数会被发送到子进程执行，参数和返回值都必须可以pickle
+    """
+    key = (tuple(selectors.items()), html_mode, compact)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = ExtractionPlan(selectors, html_mode, compact)
+
+    soup = BeautifulSoup(html, resolve_parser(parser))
+    return plan.extract(soup)
+
+
+def get_parse_mp_context():
+    """解析进程池的启动方式：优先使用forkserver，不支持时（如Windows）使用spawn
+
+    不使用fork：爬虫进程中已有抓取线程和日志线程在运行，fork出的子进程可能继承被这些线程持有的锁而死锁
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
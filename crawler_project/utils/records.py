@@ -0,0 +1,192 @@
+import json
+import sys
+import zlib
+from collections.abc import MutableMapping
+
+# 超过该长度（字符）的字符串，以及转换为JSON后超过该长度的列表和字典，压缩保存，读取时再解压
+COMPRESS_MIN_CHARS = 512
+# 不超过该长度（字符）的字符串驻留，不同页面中相同的值只保存一份
+INTERN_MAX_CHARS = 64
+
+
+class CompressedText:
+    """zlib压缩保存的长字符串（如_html字段），str()时解压"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, text):
+        self.data = zlib.compress(text.encode('utf-8'), 1)
+
+    def __str__(self):
+        return zlib.decompress(self.data).decode('utf-8')
+
+
+class CompressedJSON:
+    """zlib压缩保存的较大的列表或字典（如多个元素的文本、属性），load()时解压并还原"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, text):
+        self.data = zlib.compress(text.encode('utf-8'), 1)
+
+    def text(self):
+        return zlib.decompress(self.data).decode('utf-8')
+
+    def load(self):
+        return json.loads(self.text())
+
+
+def pack_value(value):
+    """将字段值转换为紧凑的保存形式
+
+    长字符串和较大的列表、字典压缩保存，短字符串驻留，较小的列表转为元组
+    """
+    if type(value) is str:
+        if len(value) >= COMPRESS_MIN_CHARS:
+            return CompressedText(value)
+        if len(value) <= INTERN_MAX_CHARS:
+            return sys.intern(value)
+        return value
+    if isinstance(value, (list, dict)):
+        try:
+            text = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            # 无法转换为JSON的值原样保存
+            return value
+        if len(text) >= COMPRESS_MIN_CHARS:
+            return CompressedJSON(text)
+        if isinstance(value, list):
+            return tuple(pack_value(item) for item in value)
+    return value
+
+
+def unpack_value(value):
+    """还原pack_value保存的值"""
+    value_type = type(value)
+    if value_type is CompressedText:
+        return str(value)
+    if value_type is CompressedJSON:
+        return value.load()
+    if value_type is tuple:
+        return [unpack_value(item) for item in value]
+    return value
+
+
+class RecordSchema:
+    """记录的字段名列表，字段名相同的记录共用同一个RecordSchema，每条记录只保存值"""
+
+    __slots__ = ('fields', 'index')
+
+    _schemas = {}
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.index = {name: i for i, name in enumerate(fields)}
+
+    @classmethod
+    def get(cls, fields):
+        """获取字段名对应的RecordSchema（同一组字段名只创建一次）"""
+        fields = tuple(fields)
+        schema = cls._schemas.get(fields)
+        if schema is None:
+            schema = cls._schemas.setdefault(fields, cls(fields))
+        return schema
+
+
+class PageRecord(MutableMapping):
+    """紧凑的页面提取结果，用法与字典相同（record['title']、record['source_url'] = url、dict(record)）
+
+    字段名保存在共用的RecordSchema中，每条记录只有一个值列表；长字符串和较大的列表、字典zlib压缩保存、
+    读取时解压，短字符串驻留，较小的列表以元组保存。读取列表和字典时每次返回新的对象，修改后需要重新赋值。
+    json.dumps时传入default=json_default，或调用to_dict()转换为普通字典
+    """
+
+    __slots__ = ('_schema', '_values')
+
+    def __init__(self, data=()):
+        data = dict(data)
+        self._schema = RecordSchema.get(data)
+        self._values = [pack_value(value) for value in data.values()]
+
+    @classmethod
+    def from_values(cls, fields, values):
+        """由字段名和对应的值创建记录"""
+        record = cls.__new__(cls)
+        record._schema = RecordSchema.get(fields)
+        record._values = [pack_value(value) for value in values]
+        return record
+
+    def __getitem__(self, key):
+        return unpack_value(self._values[self._schema.index[key]])
+
+    def __setitem__(self, key, value):
+        index = self._schema.index.get(key)
+        if index is None:
+            self._schema = RecordSchema.get(self._schema.fields + (key,))
+            self._values.append(pack_value(value))
+        else:
+            self._values[index] = pack_value(value)
+
+    def __delitem__(self, key):
+        index = self._schema.index[key]
+        fields = self._schema.fields
+        self._schema = RecordSchema.get(fields[:index] + fields[index + 1:])
+        del self._values[index]
+
+    def __iter__(self):
+        return iter(self._schema.fields)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._schema.index
+
+    def __repr__(self):
+        return f"PageRecord({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # 反序列化时重新取共用的RecordSchema，发送到其他进程后仍然共用字段名
+        return _rebuild_record, (self._schema.fields, self._values)
+
+    def to_dict(self):
+        """转换为普通字典"""
+        return {name: unpack_value(value) for name, value in zip(self._schema.fields, self._values)}
+
+    def to_json(self):
+        """生成JSON文本，与json.dumps(record.to_dict(), ensure_ascii=False)相同，压缩保存的列表和字典不再重新编码"""
+        parts = []
+        for name, value in zip(self._schema.fields, self._values):
+            if type(value) is CompressedJSON:
+                text = value.text()
+            else:
+                text = json.dumps(unpack_value(value), ensure_ascii=False)
+            parts.append(f"{json.dumps(str(name), ensure_ascii=False)}: {text}")
+        return '{' + ', '.join(parts) + '}'
+
+    def copy(self):
+        record = PageRecord.__new__(PageRecord)
+        record._schema = self._schema
+        record._values = list(self._values)
+        return record
+
+
+def _rebuild_record(fields, values):
+    record = PageRecord.__new__(PageRecord)
+    record._schema = RecordSchema.get(fields)
+    record._values = list(values)
+    return record
+
+
+def to_json_line(record):
+    """将一条记录转换为一行JSON文本（PageRecord直接使用to_json）"""
+    if isinstance(record, PageRecord):
+        return record.to_json()
+    return json.dumps(record, ensure_ascii=False, default=json_default)
+
+
+def json_default(value):
+    """json.dump的default参数，将PageRecord转换为普通字典"""
+    if isinstance(value, PageRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
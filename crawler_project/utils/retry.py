@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import requests
+
+# 可以重试的临时性错误状态码
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """主机已熔断，请求未发送"""
+
+
+def parse_retry_after(value):
+    """解析Retry-After响应头（秒数或HTTP日期），返回需要等待的秒数，无法解析时返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """重试策略：指数退避加随机抖动，服务器返回Retry-After时以其为准"""
+
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30, retry_statuses=RETRYABLE_STATUS_CODES):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = retry_statuses
+
+    def is_retryable_status(self, status_code):
+        """状态码是否属于临时性错误"""
+        return status_code in self.retry_statuses
+
+    @staticmethod
+    def is_retryable_exception(exc):
+        """异常是否属于临时性网络错误（连接失败、连接被重置、超时）"""
+        return isinstance(exc, (requests.exceptions.ConnectionError,
+                                requests.exceptions.Timeout,
+                                requests.exceptions.ChunkedEncodingError))
+
+    def backoff(self, attempt, retry_after=None):
+        """第attempt次（从0开始）重试前需要等待的秒数"""
+        delay = parse_retry_after(retry_after)
+        if delay is not None:
+            return min(delay, self.backoff_max)
+        # 完全随机抖动，避免多个请求在同一时刻集中重试
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """按主机的熔断器
+
+    某个主机连续失败failure_threshold次后进入熔断状态，reset_timeout秒内发往该主机的请求直接失败；
+    超时后放行一个探测请求，成功则恢复，失败则继续熔断
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._opened_at = {}
+        # 正在探测的主机 -> 发出探测请求的线程
+        self._probing = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        """是否允许向主机发送请求"""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.reset_timeout or host in self._probing:
+                return False
+            # 熔断时间已过，放行一个探测请求
+            self._probing[host] = threading.get_ident()
+            return True
+
+    def record_success(self, host):
+        """请求成功，恢复主机状态"""
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._probing.pop(host, None)
+
+    def record_failure(self, host):
+        """请求失败，连续失败达到阈值或探测请求失败时熔断"""
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if host in self._probing or failures >= self.failure_threshold:
+                self._opened_at[host] = time.monotonic()
+                self._probing.pop(host, None)
+
+    def release(self, host):
+        """当前线程的探测请求没有得到能判断主机状态的结果（如URL无效），释放探测名额，由下一个请求探测"""
+        with self._lock:
+            if self._probing.get(host) == threading.get_ident():
+                del self._probing[host]
+
+    def is_open(self, host):
+        """主机当前是否处于熔断状态"""
+        with self._lock:
+            return host in self._opened_at
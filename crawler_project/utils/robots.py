@@ -0,0 +1,84 @@
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+from utils.logger import crawler_logger
+
+
+class RobotsCache:
+    """按主机缓存robots.txt，在发送请求前判断URL是否允许抓取
+
+    fetch(url)用于下载robots.txt，返回响应或抛出requests的异常；传入爬虫发送请求的方法，
+    robots.txt的请求与页面请求使用相同的请求头、请求间隔、重试和熔断。
+    每个主机的robots.txt只在缓存过期（ttl秒）后重新获取；
+    其中的Crawl-delay / Request-rate会设置到调度器，作为该主机页面和图片请求的间隔
+    """
+
+    def __init__(self, fetch, user_agent='*', ttl=3600, scheduler=None):
+        self.fetch = fetch
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.scheduler = scheduler
+        self._entries = {}
+        self._fetch_locks = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, origin):
+        """下载并解析robots.txt：401/403禁止抓取整个主机，其余错误状态码视为没有限制"""
+        parser = RobotFileParser(origin + '/robots.txt')
+        try:
+            response = self.fetch(parser.url)
+        except requests.exceptions.RequestException as e:
+            # 无法获取robots.txt时不限制抓取，避免因网络波动停掉整个主机
+            crawler_logger.warning(f"robots.txt获取失败: {e}, URL: {parser.url}")
+            parser.allow_all = True
+            return parser
+
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif 400 <= response.status_code < 600:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+        return parser
+
+    def _apply_delay(self, origin, parser):
+        """将Crawl-delay或Request-rate设置为调度器中该主机的请求间隔"""
+        if self.scheduler is None:
+            return
+        delay = parser.crawl_delay(self.user_agent)
+        rate = parser.request_rate(self.user_agent)
+        if delay is None and rate is not None and rate.requests:
+            delay = rate.seconds / rate.requests
+        if delay is not None:
+            # 站点指定的间隔同样适用于图片请求
+            host = urlparse(origin).netloc.lower()
+            self.scheduler.set_delay(host, float(delay))
+            self.scheduler.set_delay(host, float(delay), kind='image')
+            crawler_logger.info(f"robots.txt设置请求间隔 {delay} 秒: {origin}")
+
+    def get(self, url):
+        """获取URL所在主机的robots.txt解析结果"""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+
+        entry = self._entries.get(origin)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+
+        # 同一主机只由一个线程下载robots.txt，其余线程等待结果
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(origin, threading.Lock())
+        with fetch_lock:
+            entry = self._entries.get(origin)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            parser = self._fetch(origin)
+            self._apply_delay(origin, parser)
+            self._entries[origin] = (parser, time.monotonic() + self.ttl)
+            return parser
+
+    def allowed(self, url):
+        """判断robots.txt是否允许抓取URL"""
+        return self.get(url).can_fetch(self.user_agent, url)
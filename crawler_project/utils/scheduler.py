@@ -0,0 +1,64 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class HostScheduler:
+    """按主机调度请求：同一主机的请求至少间隔delay秒，不同主机之间互不等待
+
+    image_delay不为None时，图片请求（kind='image'）使用单独的间隔和时间槽，不与页面请求排队；
+    image_delay为0时图片请求不等待，并发下载图片的线程可以同时请求同一主机。
+    image_delay为None时图片请求与页面请求共用间隔
+    """
+
+    def __init__(self, delay=1, randomize=True, image_delay=None):
+        self.delay = delay
+        self.image_delay = image_delay
+        # 随机化时实际间隔在0.5~1.5倍delay之间，避免请求节奏过于规律
+        self.randomize = randomize
+        self._host_delays = {}
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url):
+        """获取URL对应的主机标识（域名+端口）"""
+        return urlparse(url).netloc.lower()
+
+    def _kind(self, kind):
+        # 未单独设置图片间隔时，图片请求按页面请求调度
+        return 'image' if kind == 'image' and self.image_delay is not None else 'page'
+
+    def set_delay(self, host, delay, kind='page'):
+        """为指定主机单独设置请求间隔（秒），kind='image'时设置图片请求的间隔"""
+        with self._lock:
+            self._host_delays[(host, self._kind(kind))] = delay
+
+    def get_delay(self, host, kind='page'):
+        """获取指定主机的请求间隔（秒）"""
+        kind = self._kind(kind)
+        default = self.image_delay if kind == 'image' else self.delay
+        return self._host_delays.get((host, kind), default)
+
+    def reserve(self, url, kind='page'):
+        """为URL预约下一个可用的请求时间，返回需要等待的秒数"""
+        host = self.host_key(url)
+        key = (host, self._kind(kind))
+        delay = self.get_delay(host, kind)
+        if not delay:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(key, now))
+            if self.randomize:
+                delay *= random.uniform(0.5, 1.5)
+            self._next_slot[key] = slot + delay
+        return slot - now
+
+    def wait(self, url, kind='page'):
+        """阻塞直到可以向URL所在主机发送请求，返回实际等待的秒数"""
+        wait_time = self.reserve(url, kind)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
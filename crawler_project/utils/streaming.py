@@ -0,0 +1,102 @@
+import codecs
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# 流式解析时需要的标签
+STREAM_TAGS = ('a', 'img', 'base')
+
+
+def charset_from_content_type(content_type):
+    """从Content-Type中取出charset参数，没有时返回None"""
+    for param in (content_type or '').split(';')[1:]:
+        key, _, value = param.partition('=')
+        if key.strip().lower() == 'charset':
+            return value.strip().strip('"\'') or None
+    return None
+
+
+def is_allowed_content_type(content_type, allowed_types):
+    """Content-Type的媒体类型是否在allowed_types中，没有Content-Type时视为允许"""
+    media_type = (content_type or '').split(';', 1)[0].strip().lower()
+    return not media_type or media_type in allowed_types
+
+
+class _TagCollector(HTMLParser):
+    """lxml不可用时使用的内置增量解析器，只记录需要的开始标签"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in STREAM_TAGS:
+            self.tags.append((tag, {name: value or '' for name, value in attrs}))
+
+    handle_startendtag = handle_starttag
+
+
+class StreamingHTMLParser:
+    """增量HTML解析器，边接收响应体边取出a、img、base标签
+
+    feed(data)传入一段原始字节，返回这段数据中新出现的标签[(标签名, 属性字典), ...]。
+    优先使用lxml的HTMLPullParser，已处理完的元素随即释放，内存占用不随页面大小增长；
+    未安装lxml时使用内置的html.parser
+    """
+
+    def __init__(self, encoding='utf-8'):
+        try:
+            encoding = codecs.lookup(encoding or 'utf-8').name
+        except LookupError:
+            encoding = 'utf-8'
+        self.encoding = encoding
+        if etree is not None:
+            self._parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+            self._decoder = None
+        else:
+            self._parser = _TagCollector()
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    def feed(self, data):
+        """解析一段数据，返回新出现的标签"""
+        if self._decoder is None:
+            self._parser.feed(data)
+            return self._read_events()
+        self._parser.feed(self._decoder.decode(data))
+        return self._take_tags()
+
+    def close(self):
+        """数据已全部传入，返回剩余的标签"""
+        if self._decoder is None:
+            try:
+                self._parser.close()
+            except etree.XMLSyntaxError:
+                # 空文档或完全无法解析的内容
+                pass
+            return self._read_events()
+        self._parser.feed(self._decoder.decode(b'', final=True))
+        self._parser.close()
+        return self._take_tags()
+
+    def _read_events(self):
+        tags = []
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                if element.tag in STREAM_TAGS:
+                    tags.append((element.tag, dict(element.attrib)))
+                continue
+            # 元素结束时其中的标签都已取出，清空元素并删除前面的兄弟节点，释放内存
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+        return tags
+
+    def _take_tags(self):
+        tags = self._parser.tags
+        self._parser.tags = []
+        return tags
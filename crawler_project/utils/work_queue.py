@@ -0,0 +1,192 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from utils.records import json_default
+
+
+class WorkQueue:
+    """基于SQLite的共享待爬取队列，多个进程（或多个线程）可以同时从同一个队列领取URL
+
+    - 每个URL只入队一次，队列本身就是所有工作进程共享的已访问集合
+    - 工作进程领取URL时获得有效期为lease_timeout秒的租约，租约期间其他进程不会领到同一个URL；
+      进程崩溃、租约过期后URL会重新变为可领取
+    - 完成时只有仍持有租约的进程能提交结果，结果、新发现的URL和完成状态在同一个事务中写入，
+      每个URL的结果只会被记录一次
+    - 失败的URL重新排队，领取次数达到max_attempts后标记为失败；重试也不会成功的错误（permanent）直接标记为失败
+
+    多台机器共享时需要把数据库放在支持文件锁的共享存储上，或换成其他支持事务的数据库
+    """
+
+    PENDING = 'pending'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, path, lease_timeout=300, max_attempts=3):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS tasks ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE, depth INTEGER NOT NULL DEFAULT 0, '
+            'priority REAL NOT NULL DEFAULT 0, status TEXT NOT NULL, lease_owner TEXT, lease_expires REAL, '
+            'attempts INTEGER NOT NULL DEFAULT 0, error TEXT)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, priority, id)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE, worker TEXT, data TEXT NOT NULL, '
+            'finished_at REAL NOT NULL)'
+        )
+
+    def _conn(self):
+        """当前线程的数据库连接（sqlite3连接不能跨线程和进程共用）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        """开启写事务：BEGIN IMMEDIATE立即获取写锁，避免两个进程读到同一批可领取的URL"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        return conn
+
+    @staticmethod
+    def new_worker_id():
+        """生成工作进程标识：主机名-进程号-随机后缀"""
+        return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def add(self, urls, depth=0, priority=0):
+        """将URL加入队列，已入队过的URL（无论是否完成）会被忽略，返回新加入的数量"""
+        if isinstance(urls, str):
+            urls = [urls]
+        conn = self._transaction()
+        try:
+            added = self._insert(conn, urls, depth, priority)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return added
+
+    def _insert(self, conn, urls, depth, priority):
+        before = conn.total_changes
+        conn.executemany(
+            'INSERT OR IGNORE INTO tasks (url, depth, priority, status) VALUES (?, ?, ?, ?)',
+            [(url, depth, priority(url, depth) if callable(priority) else priority, self.PENDING) for url in urls]
+        )
+        return conn.total_changes - before
+
+    def lease(self, worker_id, count=1):
+        """领取最多count个待爬取的URL（包括租约已过期的），返回[(url, depth), ...]"""
+        now = time.time()
+        conn = self._transaction()
+        try:
+            rows = conn.execute(
+                'SELECT id, url, depth FROM tasks '
+                'WHERE status = ? OR (status = ? AND lease_expires < ?) '
+                'ORDER BY priority, id LIMIT ?',
+                (self.PENDING, self.LEASED, now, count)
+            ).fetchall()
+            conn.executemany(
+                'UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1 '
+                'WHERE id = ?',
+                [(self.LEASED, worker_id, now + self.lease_timeout, row[0]) for row in rows]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return [(url, depth) for _, url, depth in rows]
+
+    def renew(self, url, worker_id):
+        """延长租约，处理耗时较长时调用，返回租约是否仍属于该工作进程"""
+        cursor = self._conn().execute(
+            'UPDATE tasks SET lease_expires = ? WHERE url = ? AND status = ? AND lease_owner = ?',
+            (time.time() + self.lease_timeout, url, self.LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, url, worker_id, result=None, new_urls=(), depth=0, priority=0):
+        """提交URL的处理结果，并将新发现的URL（深度为depth）加入队列
+
+        租约已过期并被其他进程领走时提交无效，返回False，结果和新URL都不会写入
+        """
+        conn = self._transaction()
+        try:
+            cursor = conn.execute(
+                'UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, error = NULL '
+                'WHERE url = ? AND status = ? AND lease_owner = ?',
+                (self.DONE, url, self.LEASED, worker_id)
+            )
+            if cursor.rowcount != 1:
+                conn.execute('ROLLBACK')
+                return False
+            if result is not None:
+                conn.execute(
+                    'INSERT OR IGNORE INTO results (url, worker, data, finished_at) VALUES (?, ?, ?, ?)',
+                    (url, worker_id, json.dumps(result, ensure_ascii=False, default=json_default), time.time())
+                )
+            if new_urls:
+                self._insert(conn, new_urls, depth, priority)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return True
+
+    def fail(self, url, worker_id, error='', permanent=False):
+        """URL处理失败：领取次数未达到max_attempts时重新排队，否则标记为失败
+
+        permanent为True（如404、robots.txt禁止等重试也不会成功的错误）时直接标记为失败
+        """
+        max_attempts = 0 if permanent else self.max_attempts
+        cursor = self._conn().execute(
+            'UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+            'lease_owner = NULL, lease_expires = NULL, error = ? '
+            'WHERE url = ? AND status = ? AND lease_owner = ?',
+            (max_attempts, self.FAILED, self.PENDING, str(error), url, self.LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def counts(self):
+        """各状态的URL数量"""
+        counts = {self.PENDING: 0, self.LEASED: 0, self.DONE: 0, self.FAILED: 0}
+        for status, count in self._conn().execute('SELECT status, COUNT(*) FROM tasks GROUP BY status'):
+            counts[status] = count
+        return counts
+
+    def is_finished(self):
+        """队列中是否已经没有待处理和处理中的URL"""
+        row = self._conn().execute(
+            'SELECT COUNT(*) FROM tasks WHERE status IN (?, ?)', (self.PENDING, self.LEASED)
+        ).fetchone()
+        return row[0] == 0
+
+    def iter_results(self):
+        """按完成顺序逐条读取所有工作进程提交的结果"""
+        for (data,) in self._conn().execute('SELECT data FROM results ORDER BY id'):
+            yield json.loads(data)
+
+    def close(self):
+        """关闭当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None